@@ -44,7 +44,8 @@ INSTALLED_APPS = [
     'corsheaders',
     'channels',
     'cloudinary', 
-    'cloudinary_storage'
+    'cloudinary_storage',
+    'django_celery_results',
 ]
 
 MIDDLEWARE = [
@@ -149,6 +150,7 @@ AUTH_USER_MODEL = 'core.User'
 REST_FRAMEWORK = { 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     
+    # Hot read-only views opt into core.auth.authentication.ClaimsJWTAuthentication
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),  
@@ -163,6 +165,12 @@ SIMPLE_JWT = {
 }
 
 REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:6379/1',
+    },
+}
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
@@ -214,3 +222,34 @@ EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
+
+# Background jobs. With CELERY_TASK_ALWAYS_EAGER=True tasks run in-process (e.g. in tests)
+# and their results are still stored so the job-status endpoints keep working.
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=f'redis://{REDIS_HOST}:6379/2')
+CELERY_RESULT_BACKEND = 'django-db'
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_STORE_EAGER_RESULT = True
+CELERY_TASK_TRACK_STARTED = True
+
+# Write-behind batching of messages sent over the WebSocket: messages are written in one
+# transaction per batch, flushed every MESSAGE_FLUSH_INTERVAL_MS or at MESSAGE_FLUSH_BATCH_SIZE
+MESSAGE_WRITE_BEHIND = config('MESSAGE_WRITE_BEHIND', default=False, cast=bool)
+MESSAGE_FLUSH_INTERVAL_MS = config('MESSAGE_FLUSH_INTERVAL_MS', default=5, cast=int)
+MESSAGE_FLUSH_BATCH_SIZE = config('MESSAGE_FLUSH_BATCH_SIZE', default=100, cast=int)
+
+# WebSocket handshakes: users resolved from access tokens are cached per process for
+# WS_USER_CACHE_TTL seconds; saving or deleting the user drops them in every process through
+# a version kept in the shared cache. With WS_CLAIMS_USER, tokens carrying the user claims
+# (see AuthSerializer.get_token) yield a ClaimsUser and no database lookup at all.
+WS_USER_CACHE_TTL = config('WS_USER_CACHE_TTL', default=60, cast=int)
+WS_USER_CACHE_SIZE = config('WS_USER_CACHE_SIZE', default=10000, cast=int)
+WS_CLAIMS_USER = config('WS_CLAIMS_USER', default=False, cast=bool)
+
+# Reconnecting sockets can pass ?resume_from=<message id or timestamp> to get the messages
+# they missed. Resume points older than WS_RESUME_MAX_AGE seconds, or more than
+# WS_RESUME_MAX_MESSAGES messages behind, are told to resync through the REST endpoints.
+WS_RESUME_MAX_MESSAGES = config('WS_RESUME_MAX_MESSAGES', default=500, cast=int)
+WS_RESUME_MAX_AGE = config('WS_RESUME_MAX_AGE', default=24 * 60 * 60, cast=int)
+
+# Most tours that may share a (date, slot); 0 leaves the limit to the guides free for its tours
+TOUR_SLOT_CAPACITY = config('TOUR_SLOT_CAPACITY', default=0, cast=int)
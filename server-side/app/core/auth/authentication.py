@@ -0,0 +1,62 @@
+from functools import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+# Claims AuthSerializer adds to every token; a token needs all of them to stand in for the user
+USER_CLAIMS = ("role", "name", "email", "profile_id")
+
+
+class ClaimsUser(TokenUser):
+    """
+    User built from the signed claims of an access token. Role, name, email and
+    profile_id come from the token (see AuthSerializer.get_token); the id is an int
+    like User.id so it can be compared with foreign keys. It is never staff or a
+    superuser, has no groups or permissions, and any other User attribute raises
+    AttributeError instead of reading as None.
+    """
+    is_staff = False
+    is_superuser = False
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    def __str__(self):
+        return self.email or f"ClaimsUser {self.id}"
+
+    def __getattr__(self, attr):
+        # TokenUser falls back to any claim in the token, or None
+        if attr in USER_CLAIMS:
+            return self.token.get(attr)
+        raise AttributeError(f"ClaimsUser has no {attr!r}; the view needs JWTAuthentication to load the user")
+
+
+def has_user_claims(token):
+    return all(claim in token for claim in USER_CLAIMS)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that skips the user lookup on read-only requests when the
+    token carries the user claims. Unsafe methods and tokens without the claims
+    still load the User row. Not a default: views that only need the user's id,
+    role or name opt in with `authentication_classes = [ClaimsJWTAuthentication]`.
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if self.can_use_claims(request, validated_token):
+            return ClaimsUser(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def can_use_claims(self, request, token):
+        return request.method in SAFE_METHODS and has_user_claims(token)
@@ -34,12 +34,13 @@ class IsOwnResource(BasePermission):
     Permission to ensure a user can only access or modify their own data.
     """
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        # By id, so claims-based users (core.auth.authentication.ClaimsUser) match too
+        return obj.user_id == request.user.id
 
 def has_role(user, roles):
     """
     Check if the user's role is in the allowed roles.
-    :param user: User object
+    :param user: User object, or a ClaimsUser carrying the role claim
     :param roles: List of allowed roles
     :return: Boolean
     """
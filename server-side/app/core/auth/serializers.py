@@ -3,7 +3,31 @@ from rest_framework import serializers
 from core.models._User import User
 from core.models._Guide import Guide
 
+def get_profile_id(user):
+    """Id of the role-specific profile (guide, advisor or visitor) of the user, or None."""
+    if user.role == "guide":
+        profile = getattr(user, 'guide_profile', None)
+    elif user.role in ("advisor", "coordinator"):
+        profile = getattr(user, 'advisor_profile', None)
+    elif user.role == "visitor":
+        profile = getattr(user, 'visitor_profile', None)
+    else:
+        profile = None
+    return profile.id if profile else None
+
+
 class AuthSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Lets ClaimsJWTAuthentication serve read-only requests without loading the user;
+        # access tokens issued on refresh copy these claims from the refresh token
+        token = super().get_token(user)
+        token['role'] = user.role
+        token['name'] = user.name
+        token['email'] = user.email
+        token['profile_id'] = get_profile_id(user)
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data['role'] = self.user.role
@@ -4,7 +4,7 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.generics import CreateAPIView
 from drf_spectacular.utils import extend_schema, OpenApiResponse
-from core.auth.serializers import AuthSerializer, CurrentUserSerializer, UserRegisterSerializer, UserRegistrationResponseSerializer
+from core.auth.serializers import AuthSerializer, CurrentUserSerializer, UserRegisterSerializer, UserRegistrationResponseSerializer, get_profile_id
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.hashers import make_password
 
@@ -30,17 +30,13 @@ class CurrentUserView(APIView):
             "profilePicture": user.profile_picture,
         }
 
-        # If user is a guide, add guide's id
-        if user.role == "guide" and hasattr(user, 'guide_profile'):
-            data["profile_id"] = user.guide_profile.id
-
-        # If user is an advisor, add advisor's id
-        if user.role == "advisor" or user.role == "coordinator" and hasattr(user, 'advisor_profile'):
-            data["profile_id"] = user.advisor_profile.id
-            
-        # If user is an advisor, add advisor's id
-        if user.role == "visitor" and hasattr(user, 'visitor_profile'):
-            data["profile_id"] = user.visitor_profile.id
+        # Guides, advisors/coordinators and visitors get their profile id, from the token when it has one
+        if request.auth is not None and 'profile_id' in request.auth:
+            profile_id = request.auth['profile_id']
+        else:
+            profile_id = get_profile_id(user)
+        if profile_id is not None:
+            data["profile_id"] = profile_id
 
         return Response(data)
 
@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from core.models._Guide import Guide
+
+AVAILABILITY_MATRIX_CACHE_KEY = 'guides:availability-matrix'
+AVAILABILITY_MATRIX_CACHE_TIMEOUT = 60 * 60
+SLOT_COUNT = 28
+
+
+def pack_availability(availability):
+    """Pack a 28-slot availability list into an int with bit i set when slot i is available."""
+    mask = 0
+    for index, value in enumerate(availability[:SLOT_COUNT]):
+        if value == 1:
+            mask |= 1 << index
+    return mask
+
+
+def build_availability_matrix():
+    """Guides x slots availability as parallel lists of guide ids, names and bitmasks, in one query."""
+    guide_ids, names, masks = [], [], []
+    rows = Guide.objects.order_by('id').values_list('id', 'user__name', 'availability')
+    for guide_id, name, availability in rows:
+        guide_ids.append(guide_id)
+        names.append(name)
+        masks.append(pack_availability(availability))
+    return {"slots": SLOT_COUNT, "guide_ids": guide_ids, "names": names, "masks": masks}
+
+
+def get_availability_matrix():
+    matrix = cache.get(AVAILABILITY_MATRIX_CACHE_KEY)
+    if matrix is None:
+        matrix = build_availability_matrix()
+        cache.set(AVAILABILITY_MATRIX_CACHE_KEY, matrix, AVAILABILITY_MATRIX_CACHE_TIMEOUT)
+    return matrix
+
+
+def invalidate_availability_matrix():
+    cache.delete(AVAILABILITY_MATRIX_CACHE_KEY)
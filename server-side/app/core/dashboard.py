@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.db import connection
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.models._TourRequest import TourRequest
+from core.models._Visitor import Visitor
+
+DASHBOARD_CACHE_KEY = 'advisor:dashboard'
+DASHBOARD_CACHE_TIMEOUT = 10 * 60
+
+
+def build_dashboard_stats():
+    """All advisor dashboard counts in one query, plus one projection query for guide ratings."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'COMPLETED'),
+                COUNT(*) FILTER (WHERE status = 'REJECTED'),
+                (SELECT COUNT(*) FROM {TourRequest._meta.db_table}),
+                (SELECT COUNT(*) FROM {Visitor._meta.db_table}),
+                (SELECT COUNT(*) FROM {Guide._meta.db_table})
+            FROM {Tour._meta.db_table}
+        """)
+        completed, rejected, tour_requests, visitors, guides = cursor.fetchone()
+
+    guides_ratings = [
+        {"name": name, "rating": rating}
+        for name, rating in Guide.objects.order_by('id').values_list('user__name', 'rating')
+    ]
+    return {
+        "completed_tours_count": completed,
+        "tour_requests_count": tour_requests,
+        "rejected_tours_count": rejected,
+        "total_visitors_count": visitors,
+        "total_guides_count": guides,
+        "guides_ratings": guides_ratings,
+    }
+
+
+def get_dashboard_stats():
+    stats = cache.get(DASHBOARD_CACHE_KEY)
+    if stats is None:
+        stats = build_dashboard_stats()
+        cache.set(DASHBOARD_CACHE_KEY, stats, DASHBOARD_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    cache.delete(DASHBOARD_CACHE_KEY)
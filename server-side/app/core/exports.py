@@ -0,0 +1,51 @@
+import csv
+import tempfile
+from django.http import FileResponse, StreamingHttpResponse
+from core.reports import write_workbook
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Workbooks up to this size stay in memory, larger ones spill to a temporary file
+XLSX_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class Echo:
+    """File-like object whose write() hands the formatted line back to csv.writer's caller."""
+    def write(self, value):
+        return value
+
+
+def csv_response(header, rows, filename):
+    """Stream rows as CSV; each line is sent as soon as its row is read from the cursor."""
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(title, header, rows, filename):
+    """
+    Write rows into a write-only workbook and send it in chunks. An xlsx file is a zip
+    archive that is only complete once saved, so it is spooled before sending.
+    """
+    workbook_file = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_SIZE)
+    write_workbook(title, header, rows, workbook_file)
+    workbook_file.seek(0)
+    return FileResponse(
+        workbook_file,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def export_response(file_type, title, header, rows, filename):
+    if file_type == 'xlsx':
+        return xlsx_response(title, header, rows, filename)
+    return csv_response(header, rows, filename)
@@ -0,0 +1,61 @@
+"""
+Django command to benchmark broadcast fan-out through the configured channel layer
+"""
+
+import random
+import time
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from core.messaging.fanout import PRESENCE_KEY, PRESENCE_TIMEOUT, fan_out, user_group
+
+# Synthetic user ids far above real ones so the run cannot reach real sockets
+FIRST_USER_ID = 10_000_000
+
+
+class Command(BaseCommand):
+    """Compare presence-filtered batched fan-out against one group_send per receiver"""
+    help = "Benchmark broadcast fan-out latency for many receivers with a fraction of them online"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--receivers', type=int, default=10000)
+        parser.add_argument('--online-fraction', type=float, default=0.1)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        async_to_sync(self.run)(options)
+
+    async def run(self, options):
+        channel_layer = get_channel_layer()
+        rng = random.Random(options['seed'])
+        user_ids = list(range(FIRST_USER_ID, FIRST_USER_ID + options['receivers']))
+        online_ids = rng.sample(user_ids, int(len(user_ids) * options['online_fraction']))
+        channels = {user_id: await channel_layer.new_channel() for user_id in online_ids}
+
+        for user_id, channel in channels.items():
+            await channel_layer.group_add(user_group(user_id), channel)
+        await sync_to_async(cache.set_many)({PRESENCE_KEY.format(user_id): 1 for user_id in online_ids}, PRESENCE_TIMEOUT)
+        event = {"type": "chat_message", "message": {"id": 0, "content": "x" * 200, "message_type": "broadcast"}}
+
+        try:
+            sequential, targeted = [], []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                for user_id in user_ids:
+                    await channel_layer.group_send(user_group(user_id), event)
+                sequential.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                delivered = await fan_out(user_ids, event, channel_layer=channel_layer)
+                targeted.append(time.perf_counter() - started)
+        finally:
+            for user_id, channel in channels.items():
+                await channel_layer.group_discard(user_group(user_id), channel)
+            await sync_to_async(cache.delete_many)([PRESENCE_KEY.format(user_id) for user_id in online_ids])
+
+        self.stdout.write(f"Channel layer: {type(channel_layer).__name__}")
+        self.stdout.write(f"Receivers: {len(user_ids)}, online: {len(online_ids)}, delivered to: {delivered} groups")
+        self.stdout.write(f"One group_send per receiver: best {min(sequential) * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Batched fan-out to online receivers: best {min(targeted) * 1000:.1f} ms"))
@@ -0,0 +1,58 @@
+"""
+Django command to benchmark the guide assignment engine on synthetic data
+"""
+
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from core.scheduling.guide_assignment import SLOTS_PER_DAY, assign_guides
+
+
+def synthetic_problem(tour_count, guide_count, days, slots_per_guide, guides_per_tour, seed):
+    rng = random.Random(seed)
+    start = date(2025, 9, 1)
+    tours = [
+        (tour_id, start + timedelta(days=rng.randrange(days)), rng.randrange(SLOTS_PER_DAY), guides_per_tour)
+        for tour_id in range(tour_count)
+    ]
+    guides = [
+        (guide_id, rng.sample(range(7 * SLOTS_PER_DAY), slots_per_guide), round(rng.uniform(0, 5), 1))
+        for guide_id in range(guide_count)
+    ]
+    return tours, guides
+
+
+class Command(BaseCommand):
+    """Run assign_guides on random tours and guides and report timing and load spread"""
+    help = "Benchmark the guide assignment engine on synthetic data (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tours', type=int, default=2000)
+        parser.add_argument('--guides', type=int, default=3000)
+        parser.add_argument('--days', type=int, default=120)
+        parser.add_argument('--slots-per-guide', type=int, default=6)
+        parser.add_argument('--guides-per-tour', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        tours, guides = synthetic_problem(
+            options['tours'], options['guides'], options['days'],
+            options['slots_per_guide'], options['guides_per_tour'], options['seed'],
+        )
+        started = time.perf_counter()
+        assignments = assign_guides(tours, guides)
+        elapsed = time.perf_counter() - started
+
+        needed = sum(tour[3] for tour in tours)
+        assigned = sum(len(guide_ids) for guide_ids in assignments.values())
+        loads = {}
+        for guide_ids in assignments.values():
+            for guide_id in guide_ids:
+                loads[guide_id] = loads.get(guide_id, 0) + 1
+
+        self.stdout.write(f"Tours: {len(tours)}, guides: {len(guides)}, guide slots needed: {needed}")
+        self.stdout.write(f"Assigned guide slots: {assigned}, tours staffed: {len(assignments)}")
+        if loads:
+            self.stdout.write(f"Guides used: {len(loads)}, max load: {max(loads.values())}")
+        self.stdout.write(self.style.SUCCESS(f"Solved in {elapsed:.2f}s"))
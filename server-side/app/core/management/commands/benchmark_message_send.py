@@ -0,0 +1,100 @@
+"""
+Django command to benchmark the per-message cost of delivering a sent message to sockets
+"""
+
+import json
+import statistics
+import time
+from types import SimpleNamespace
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from core.models._User import User
+from core.messaging._Message import Chat, Message
+from core.messaging.fanout import PRESENCE_KEY, PRESENCE_TIMEOUT, dispatch_message_sync, user_group, wire_frame
+from core.messaging.serializer import MessageSerializer
+
+BENCHMARK_CONTENT = "benchmark_message_send"
+
+# Frames go to synthetic user ids far above real ones so the run cannot reach real sockets
+FIRST_USER_ID = 10_000_000
+
+# Sends between swapping the groups' channels for fresh ones, below the layer's channel capacity
+ROTATE_EVERY = 50
+
+
+class Command(BaseCommand):
+    """Time SendMessageView's delivery step before and after the shared dispatcher"""
+    help = "Benchmark per-message send latency: serialize per use and group_send per participant, versus dispatch_message"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--broadcast-receivers', type=int, default=200)
+
+    def handle(self, *args, **options):
+        users = list(User.objects.order_by('id')[:max(2, options['broadcast_receivers'])])
+        if len(users) < 2:
+            self.stderr.write("Benchmark needs at least two users")
+            return
+        channel_layer = get_channel_layer()
+        request = SimpleNamespace(user=users[0])
+        chat, created = Chat.objects.get_or_create(participant1=users[0], participant2=users[1])
+        direct = Message.objects.create(sender=users[0], chat=chat, message_type='direct', content=BENCHMARK_CONTENT)
+        broadcast = Message.objects.create(sender=users[0], message_type='broadcast', content=BENCHMARK_CONTENT)
+        broadcast.receivers.set(users)
+        participant_ids = [FIRST_USER_ID, FIRST_USER_ID + 1]
+        channels = async_to_sync(self.join_groups)(channel_layer, participant_ids)
+
+        try:
+            def per_use():
+                # Previous SendMessageView: one serialization per use, one event-loop hop per participant
+                data = MessageSerializer(direct, context={'request': request}).data
+                for user_id in participant_ids:
+                    async_to_sync(channel_layer.group_send)(user_group(user_id), {"type": "chat_message", "message": data})
+                MessageSerializer(direct, context={'request': request}).data
+
+            def dispatched():
+                data = MessageSerializer(direct, context={'request': request}).data
+                dispatch_message_sync(data, participant_ids, channel_layer=channel_layer)
+
+            before = self.measure(per_use, channel_layer, channels, options['messages'])
+            after = self.measure(dispatched, channel_layer, channels, options['messages'])
+            broadcast_data = MessageSerializer(broadcast, context={'request': request}).data
+        finally:
+            async_to_sync(self.leave_groups)(channel_layer, channels)
+            Message.objects.filter(content=BENCHMARK_CONTENT).delete()
+            if created:
+                chat.delete()
+
+        self.stdout.write(f"Channel layer: {type(channel_layer).__name__}, direct messages: {options['messages']}")
+        self.stdout.write(f"Serialize per use, group_send per participant: p50 {before[0]:.2f} ms, p95 {before[1]:.2f} ms")
+        self.stdout.write(self.style.SUCCESS(f"dispatch_message: p50 {after[0]:.2f} ms, p95 {after[1]:.2f} ms"))
+        self.stdout.write(
+            f"Broadcast to {len(users)} receivers, bytes per frame: "
+            f"with receivers {len(json.dumps({'message': broadcast_data}))}, wire frame {len(wire_frame(broadcast_data))}"
+        )
+
+    def measure(self, send, channel_layer, channels, count):
+        timings = []
+        for index in range(count):
+            if index and index % ROTATE_EVERY == 0:
+                # Fresh channels keep every send under capacity, so none is dropped
+                async_to_sync(self.leave_groups)(channel_layer, channels)
+                channels.update(async_to_sync(self.join_groups)(channel_layer, list(channels)))
+            started = time.perf_counter()
+            send()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), statistics.quantiles(timings, n=20)[-1]
+
+    async def join_groups(self, channel_layer, user_ids):
+        channels = {user_id: await channel_layer.new_channel() for user_id in user_ids}
+        for user_id, channel in channels.items():
+            await channel_layer.group_add(user_group(user_id), channel)
+        await sync_to_async(cache.set_many)({PRESENCE_KEY.format(user_id): 1 for user_id in user_ids}, PRESENCE_TIMEOUT)
+        return channels
+
+    async def leave_groups(self, channel_layer, channels):
+        for user_id, channel in channels.items():
+            await channel_layer.group_discard(user_group(user_id), channel)
+        await sync_to_async(cache.delete_many)([PRESENCE_KEY.format(user_id) for user_id in channels])
@@ -0,0 +1,80 @@
+"""
+Django command to benchmark WebSocket message writes, per frame versus write-behind batches
+"""
+
+import asyncio
+import time
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.models._User import User
+from core.messaging._Message import Message
+from core.messaging.batching import MessageWriteBuffer
+from core.messaging.consumers import ChatConsumer
+
+BENCHMARK_CONTENT = "benchmark_message_writes"
+
+
+class Command(BaseCommand):
+    """Push messages from many concurrent senders through both write paths and report throughput"""
+    help = "Benchmark message throughput with and without write-behind batching (writes and then deletes rows)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--senders', type=int, default=50)
+        parser.add_argument('--receivers', type=int, default=3)
+        parser.add_argument('--flush-interval-ms', type=int, default=settings.MESSAGE_FLUSH_INTERVAL_MS)
+        parser.add_argument('--batch-size', type=int, default=settings.MESSAGE_FLUSH_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        users = list(User.objects.order_by('id')[:max(options['senders'], options['receivers'])])
+        if not users:
+            self.stderr.write("Benchmark needs at least one user")
+            return
+        receiver_ids = [user.id for user in users[:options['receivers']]]
+        try:
+            per_frame = async_to_sync(self.run_per_frame)(users, receiver_ids, options)
+            batched = async_to_sync(self.run_batched)(users, receiver_ids, options)
+        finally:
+            Message.objects.filter(content=BENCHMARK_CONTENT).delete()
+
+        self.stdout.write(f"Messages: {options['messages']}, concurrent senders: {options['senders']}, receivers each: {len(receiver_ids)}")
+        self.stdout.write(f"Per-frame writes: {per_frame:.2f}s ({options['messages'] / per_frame:.0f} msg/s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Write-behind ({options['flush_interval_ms']} ms / {options['batch_size']} messages): "
+            f"{batched:.2f}s ({options['messages'] / batched:.0f} msg/s)"
+        ))
+
+    async def run_senders(self, users, options, send_one):
+        per_sender = options['messages'] // options['senders']
+
+        async def sender(user):
+            for _ in range(per_sender):
+                await send_one(user)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sender(users[index % len(users)]) for index in range(options['senders'])))
+        return time.perf_counter() - started
+
+    async def run_per_frame(self, users, receiver_ids, options):
+        # The consumer's own create/serialize hops, without a socket
+        consumer = ChatConsumer()
+
+        async def send_one(user):
+            consumer.scope = {"user": user}
+            message = await consumer.create_message(
+                sender=user, receiver_ids=receiver_ids, message_type='broadcast', content=BENCHMARK_CONTENT,
+            )
+            await consumer.serialize_message(message)
+
+        return await self.run_senders(users, options, send_one)
+
+    async def run_batched(self, users, receiver_ids, options):
+        buffer = MessageWriteBuffer(flush_interval=options['flush_interval_ms'], batch_size=options['batch_size'])
+
+        async def send_one(user):
+            await buffer.submit(user.id, 'broadcast', BENCHMARK_CONTENT, receiver_ids)
+
+        elapsed = await self.run_senders(users, options, send_one)
+        buffer.flusher.cancel()
+        return elapsed
@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import connections, models
 from django.core.exceptions import ValidationError
+from django.db.models.functions import Coalesce, JSONObject
+from django.db.models.lookups import IsNull
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from core.models._User import User
 
 MESSAGE_TYPES = [
@@ -7,12 +11,41 @@ MESSAGE_TYPES = [
     ('direct', 'Direct Message'),
 ]
 
+class ChatQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(models.Q(participant1_id=user.pk) | models.Q(participant2_id=user.pk))
+
+    def with_previews(self, user):
+        """
+        Load both participants and annotate, in the same query, each chat's latest
+        message as `last_message` (id, sender_id, content, timestamp), `last_activity`
+        (its timestamp, or the chat's creation) and the user's `unread_count`.
+        """
+        latest = Message.objects.filter(chat_id=models.OuterRef('pk')).order_by('-timestamp', '-id')
+        read_up_to = ReadWatermark.objects.filter(
+            user_id=user.pk, chat_id=models.OuterRef('pk'),
+        ).values('last_read_message_id')[:1]
+        unread = Message.objects.filter(
+            chat_id=models.OuterRef('pk'), id__gt=models.OuterRef('read_up_to'),
+        ).exclude(sender_id=user.pk).order_by().values('chat_id').annotate(count=models.Count('*')).values('count')
+        return self.select_related('participant1', 'participant2').annotate(
+            last_message=models.Subquery(latest.values(
+                json=JSONObject(id='id', sender_id='sender_id', content='content', timestamp='timestamp'),
+            )[:1]),
+            last_activity=Coalesce(models.Subquery(latest.values('timestamp')[:1]), 'created_at'),
+            read_up_to=Coalesce(models.Subquery(read_up_to), 0),
+            unread_count=Coalesce(models.Subquery(unread), 0),
+        )
+
+
 class Chat(models.Model):
     """Represents a one-to-one chat session between two users."""
     participant1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chats_as_participant1')
     participant2 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chats_as_participant2')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ChatQuerySet.as_manager()
+
     def __str__(self):
         return f"Chat between {self.participant1.name} and {self.participant2.name}"
 
@@ -25,6 +58,103 @@ class Chat(models.Model):
         ordering = ['-created_at']
 
 
+class MessageQuerySet(models.QuerySet):
+    """Inbox queries that annotate per-user fields instead of loading M2M rows per message."""
+    def received_by(self, user):
+        return self.filter(receivers=user.pk)
+
+    def sent_by(self, user):
+        return self.filter(sender_id=user.pk)
+
+    def seen_by_subquery(self, user):
+        """Watermarks of `user` that cover the outer message: same chat, or both broadcast."""
+        return ReadWatermark.objects.filter(
+            models.Q(chat_id=models.OuterRef('chat_id'))
+            | models.Q(IsNull(models.OuterRef('chat_id'), True), chat__isnull=True),
+            user_id=user.pk,
+            last_read_message_id__gte=models.OuterRef('pk'),
+        )
+
+    def position(self, cursor):
+        """
+        Resolve a cursor to a (timestamp, id) position for before()/after(): the id of
+        a message in this queryset, or an ISO 8601 timestamp (id None). Raises ValueError.
+        """
+        cursor = str(cursor)
+        if cursor.isdigit():
+            position = self.filter(id=int(cursor)).values_list('timestamp', 'id').first()
+            if position is None:
+                raise ValueError("Cursor message not found.")
+            return position
+        timestamp = parse_datetime(cursor)
+        if timestamp is None:
+            raise ValueError("Cursor must be a message id or an ISO 8601 timestamp.")
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+        return timestamp, None
+
+    def before(self, timestamp, message_id=None):
+        """Messages older than a (timestamp, id) position; without an id, older than the timestamp."""
+        if message_id is None:
+            return self.filter(timestamp__lt=timestamp)
+        # The redundant bound lets the planner start the index range at the timestamp
+        return self.filter(
+            models.Q(timestamp__lt=timestamp) | models.Q(timestamp=timestamp, id__lt=message_id),
+            timestamp__lte=timestamp,
+        )
+
+    def after(self, timestamp, message_id=None):
+        """Messages newer than a (timestamp, id) position; without an id, newer than the timestamp."""
+        if message_id is None:
+            return self.filter(timestamp__gt=timestamp)
+        return self.filter(
+            models.Q(timestamp__gt=timestamp) | models.Q(timestamp=timestamp, id__gt=message_id),
+            timestamp__gte=timestamp,
+        )
+
+    def visible_to(self, user):
+        """Messages delivered to the user's group: messages of their chats and broadcasts they received or sent."""
+        received = Message.receivers.through.objects.filter(user_id=user.pk).values('message_id')
+        return self.filter(
+            models.Q(chat_id__in=Chat.objects.for_user(user).values('id'))
+            | models.Q(id__in=received)
+            | models.Q(sender_id=user.pk, chat__isnull=True)
+        )
+
+    def missed_by(self, user, timestamp, message_id=None, limit=100):
+        """
+        Ids of the first `limit` messages after a position that were delivered to the
+        user's group: messages of their chats and broadcasts they received or sent.
+        Each stream is read from its own index and the streams are merged, oldest first.
+        """
+        streams = [
+            self.filter(chat_id__in=Chat.objects.for_user(user).values('id')),
+            self.received_by(user),
+            self.sent_by(user).filter(chat__isnull=True),
+        ]
+        streams = [
+            stream.after(timestamp, message_id).order_by('timestamp', 'id').values_list('timestamp', 'id')[:limit]
+            for stream in streams
+        ]
+        merged = streams[0].union(*streams[1:]).order_by('timestamp', 'id')[:limit]
+        return [message_id for _, message_id in merged]
+
+    def unseen_by(self, user):
+        return self.filter(~models.Exists(self.seen_by_subquery(user)))
+
+    def with_seen_flag(self, user):
+        return self.annotate(seen_by_user=models.Exists(self.seen_by_subquery(user)))
+
+    def with_inbox_fields(self, user):
+        """Load the sender and annotate `seen_by_user` and `receivers_count` in the same query."""
+        receivers_count = Message.receivers.through.objects.filter(
+            message_id=models.OuterRef('pk'),
+        ).order_by().values('message_id').annotate(count=models.Count('*')).values('count')
+        return self.select_related('sender').with_seen_flag(user).annotate(
+            receivers_count=Coalesce(models.Subquery(receivers_count), 0),
+        )
+
+
 class Message(models.Model):
     """Represents a message sent in a chat or broadcasted."""
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
@@ -33,7 +163,8 @@ class Message(models.Model):
     message_type = models.CharField(max_length=20, choices=MESSAGE_TYPES, default='direct')
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
-    is_seen = models.ManyToManyField(User, related_name='seen_messages', blank=True)  # Track which users have seen the message
+
+    objects = MessageQuerySet.as_manager()
 
     def __str__(self):
         content_preview = (self.content[:30] + '...') if len(self.content) > 30 else self.content
@@ -49,3 +180,54 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='core_message_timestamp_id_idx'),
+            models.Index(fields=['sender', 'timestamp', 'id'], name='core_message_sender_ts_idx'),
+            models.Index(fields=['chat', 'timestamp', 'id'], name='core_message_chat_ts_idx'),
+        ]
+
+
+class ReadWatermarkQuerySet(models.QuerySet):
+    def for_stream(self, user, chat_id):
+        """The watermark of one chat, or of the user's broadcasts when chat_id is None."""
+        return self.filter(user_id=user.pk, chat_id=chat_id)
+
+    def mark_read(self, user, messages):
+        """
+        Advance the user's watermarks to the newest of `messages` in each of their
+        streams with a single INSERT ... ON CONFLICT. Watermarks never move backwards.
+        """
+        latest = messages.order_by().values('chat_id').annotate(last_read=models.Max('id')).values('chat_id', 'last_read')
+        latest_sql, latest_params = latest.query.sql_with_params()
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {table} (user_id, chat_id, last_read_message_id, updated_at)
+                SELECT %s, latest.chat_id, latest.last_read, NOW() FROM ({latest_sql}) AS latest
+                ON CONFLICT (user_id, chat_id) DO UPDATE SET
+                    last_read_message_id = GREATEST({table}.last_read_message_id, EXCLUDED.last_read_message_id),
+                    updated_at = EXCLUDED.updated_at
+                ''',
+                (user.pk, *latest_params),
+            )
+            return cursor.rowcount
+
+
+class ReadWatermark(models.Model):
+    """
+    Highest message id a user has read in one chat, or across the broadcasts they
+    received when chat is null. Every message up to the watermark counts as seen.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='read_watermarks')
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='read_watermarks', null=True, blank=True)
+    last_read_message_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ReadWatermarkQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # NULLS NOT DISTINCT so each user has a single broadcast watermark
+            models.UniqueConstraint(fields=['user', 'chat'], name='core_readwatermark_user_chat_uniq', nulls_distinct=False),
+        ]
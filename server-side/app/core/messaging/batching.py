@@ -0,0 +1,91 @@
+import asyncio
+import weakref
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from core.models._User import User
+from core.messaging._Message import MESSAGE_TYPES, Message
+from core.messaging.serializer import MessageSerializer
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind queue for messages sent over the WebSocket. Senders await submit();
+    a flusher task writes everything queued within MESSAGE_FLUSH_INTERVAL_MS (or up
+    to MESSAGE_FLUSH_BATCH_SIZE messages) in one transaction and one thread hop,
+    then resolves each sender's future with the serialized message.
+    """
+    def __init__(self, flush_interval=None, batch_size=None):
+        self.flush_interval = (settings.MESSAGE_FLUSH_INTERVAL_MS if flush_interval is None else flush_interval) / 1000
+        self.batch_size = settings.MESSAGE_FLUSH_BATCH_SIZE if batch_size is None else batch_size
+        self.queue = asyncio.Queue()
+        self.flusher = None
+
+    async def submit(self, sender_id, message_type, content, receiver_ids):
+        """Queue a message and wait until it is committed; returns its serialized data."""
+        # Checked here, as Message.save would, so one bad frame cannot fail the whole batch
+        if message_type not in dict(MESSAGE_TYPES):
+            raise ValidationError("Invalid message type.")
+        if message_type == 'direct':
+            raise ValidationError("Direct messages must be associated with a chat.")
+        try:
+            receiver_ids = [int(receiver_id) for receiver_id in receiver_ids]
+        except (TypeError, ValueError):
+            raise ValidationError("Receivers must be a list of user ids.")
+
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self.run())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((Message(sender_id=sender_id, message_type=message_type, content=content), receiver_ids, future))
+        return await future
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                data = await sync_to_async(self.write)([(message, receiver_ids) for message, receiver_ids, _ in batch])
+            except Exception as error:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (_, _, future), message_data in zip(batch, data):
+                if not future.done():
+                    future.set_result(message_data)
+
+    @staticmethod
+    def write(batch):
+        """Insert a batch of messages with their receivers and return them serialized, in constant queries."""
+        requested = {receiver_id for _, receiver_ids in batch for receiver_id in receiver_ids}
+        existing = set(User.objects.filter(id__in=requested).values_list('id', flat=True))
+        with transaction.atomic():
+            messages = Message.objects.bulk_create([message for message, _ in batch])
+            Message.receivers.through.objects.bulk_create([
+                Message.receivers.through(message_id=message.id, user_id=receiver_id)
+                for message, (_, receiver_ids) in zip(messages, batch)
+                for receiver_id in set(receiver_ids) & existing
+            ])
+        saved = Message.objects.filter(id__in=[message.id for message in messages]).select_related('sender').prefetch_related('receivers').in_bulk()
+        return MessageSerializer([saved[message.id] for message in messages], many=True).data
+
+
+_buffers = weakref.WeakKeyDictionary()
+
+
+def get_message_write_buffer():
+    """The write buffer of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    if loop not in _buffers:
+        _buffers[loop] = MessageWriteBuffer()
+    return _buffers[loop]
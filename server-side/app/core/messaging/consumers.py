@@ -1,9 +1,20 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
+import asyncio
 import json
+from datetime import timedelta
+from urllib.parse import parse_qs
 from asgiref.sync import sync_to_async
-from core.messaging._Message import Message
-from core.messaging.serializer import MessageSerializer
+from core.messaging._Message import Message, ReadWatermark
+from django.db.models import Q
+from core.messaging.serializer import InboxMessageSerializer, MessageSerializer
+from core.messaging.fanout import (
+    PRESENCE_HEARTBEAT, dispatch_message, mark_offline, mark_online, refresh_presence, user_group, wire_frame,
+)
+from core.messaging.batching import get_message_write_buffer
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -11,6 +22,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.room_group_name = None  # Initialize room_group_name to prevent AttributeError
+        self.presence_heartbeat = None
 
     async def connect(self):
         self.user = self.scope["user"]
@@ -18,16 +30,64 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             print("WebSocket connection rejected: Anonymous user")
         else:
-            self.room_group_name = f'user_{self.user.id}'
+            self.room_group_name = user_group(self.user.id)
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-            await self.channel_layer.group_add('broadcast', self.channel_name)
+            await mark_online(self.user.id)
+            self.presence_heartbeat = asyncio.create_task(self.keep_presence())
             print(f"WebSocket connection accepted for user: {self.user}")
             await self.accept()
 
+            # Reconnecting clients pass the last message they saw as ?resume_from=<id or timestamp>
+            resume_from = parse_qs(self.scope["query_string"].decode()).get("resume_from", [None])[0]
+            if resume_from:
+                await self.replay_missed_messages(resume_from)
+
+    async def keep_presence(self):
+        """Keep the user's presence counter alive for as long as this socket stays open."""
+        while True:
+            await asyncio.sleep(PRESENCE_HEARTBEAT)
+            await refresh_presence(self.user.id)
+
+    async def replay_missed_messages(self, cursor):
+        """
+        Send the messages the user missed since `cursor`, oldest first, then
+        {"resumed": <count>}; live delivery follows. The socket has already joined its
+        group, so a message may arrive both replayed and live and clients drop repeats
+        by id. Clients too far behind get {"resync_required": true} and refetch instead.
+        """
+        messages, reason = await self.load_missed_messages(cursor)
+        if messages is None:
+            await self.send(json.dumps({"resync_required": True, "reason": reason}))
+            return
+        for message in messages:
+            await self.send(wire_frame(message))
+        await self.send(json.dumps({"resumed": len(messages)}))
+
+    @sync_to_async
+    def load_missed_messages(self, cursor):
+        """Missed messages serialized as live ones, or None and a reason when a resync is needed."""
+        try:
+            # A message id cursor must be one the user could have seen
+            timestamp, message_id = Message.objects.visible_to(self.user).position(cursor)
+        except ValueError as e:
+            return None, str(e)
+        if timestamp < timezone.now() - timedelta(seconds=settings.WS_RESUME_MAX_AGE):
+            return None, "Resume point is too old."
+
+        max_messages = settings.WS_RESUME_MAX_MESSAGES
+        message_ids = Message.objects.missed_by(self.user, timestamp, message_id, limit=max_messages + 1)
+        if len(message_ids) > max_messages:
+            return None, "Too many missed messages."
+        # Frames carry no receiver list, so the inbox serialization (one query, no receivers) is used
+        messages = Message.objects.filter(id__in=message_ids).with_inbox_fields(self.user).order_by('timestamp', 'id')
+        return InboxMessageSerializer(messages, many=True).data, None
+
     async def disconnect(self, close_code):
+        if self.presence_heartbeat:
+            self.presence_heartbeat.cancel()
         if self.room_group_name:  # Ensure it exists before trying to discard
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
-        await self.channel_layer.group_discard('broadcast', self.channel_name)
+            await mark_offline(self.user.id)
 
     async def receive(self, text_data):
         try:
@@ -40,47 +100,55 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 await self.send(json.dumps({"error": "Message content cannot be empty."}))
                 return
 
-            message = await self.create_message(
-                sender=self.user,
-                receiver_ids=receiver_ids,
-                message_type=message_type,
-                content=content
-            )
-            serializer_data = await self.serialize_message(message)
-
-            if message_type == 'broadcast':
-                await self.channel_layer.group_send(
-                    'broadcast',
-                    {'type': 'chat_message', 'message': serializer_data}
+            if settings.MESSAGE_WRITE_BEHIND:
+                # Resolves once the batch holding this message is committed
+                serializer_data = await get_message_write_buffer().submit(
+                    self.user.id, message_type, content, receiver_ids
                 )
             else:
-                for receiver_id in receiver_ids:
-                    receiver_group_name = f'user_{receiver_id}'
-                    await self.channel_layer.group_send(
-                        receiver_group_name,
-                        {'type': 'chat_message', 'message': serializer_data}
-                    )
+                message = await self.create_message(
+                    sender=self.user,
+                    receiver_ids=receiver_ids,
+                    message_type=message_type,
+                    content=content
+                )
+                serializer_data = await self.serialize_message(message)
+
+            # Only the receivers' own groups get the message, broadcast or not
+            recipient_ids = list(receiver_ids)
+            if message_type == 'broadcast':
+                recipient_ids.append(self.user.id)
+            await dispatch_message(serializer_data, recipient_ids, channel_layer=self.channel_layer)
             await self.send(json.dumps({"success": "Message sent successfully."}))
         except json.JSONDecodeError:
             await self.send(json.dumps({"error": "Invalid JSON payload."}))
+        except ValidationError as e:
+            await self.send(json.dumps({"error": e.messages[0]}))
         except Exception as e:
             print(f"Error processing WebSocket message: {e}")
             await self.send(json.dumps({"error": "Internal server error."}))
 
     @sync_to_async
     def mark_messages_as_seen(self, message_ids):
-        messages = Message.objects.filter(id__in=message_ids)
-        for message in messages:
-            message.is_seen.add(self.user)
+        # Only messages the user can see move their watermarks
+        messages = Message.objects.filter(id__in=message_ids).filter(
+            Q(receivers=self.user.id) | Q(chat__participant1=self.user.id) | Q(chat__participant2=self.user.id)
+        )
+        ReadWatermark.objects.mark_read(self.user, messages)
         print(f"Marked messages {message_ids} as seen for user {self.user}.")
 
     async def chat_message(self, event):
+        # Events from dispatch_message carry the frame already encoded
+        if 'text' in event:
+            await self.send(event['text'])
+            return
         message = event['message']
         await self.send(json.dumps({'message': message}))
 
     @sync_to_async
     def create_message(self, sender, receiver_ids, message_type, content):
-        message = Message.objects.create(sender=sender, message_type=message_type, content=content)
+        # By id, as the scope user may be a ClaimsUser built from token claims
+        message = Message.objects.create(sender_id=sender.id, message_type=message_type, content=content)
         receivers = User.objects.filter(id__in=receiver_ids)
         message.receivers.set(receivers)
         return message
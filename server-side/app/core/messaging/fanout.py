@@ -0,0 +1,173 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels_redis.core import RedisChannelLayer
+from django.core.cache import cache
+
+# Presence counters expire unless refreshed: on every connect and by a heartbeat of each
+# open socket (see refresh_presence). Stale ones only cost a wasted send
+PRESENCE_KEY = 'messaging:online:{}'
+PRESENCE_TIMEOUT = 24 * 60 * 60
+PRESENCE_HEARTBEAT = PRESENCE_TIMEOUT // 4
+
+# Groups sent to per batch: one Lua call on Redis, or concurrent group_send calls on other layers
+FANOUT_BATCH_SIZE = 500
+
+# Private RedisChannelLayer members redis_group_send_many relies on. channels_redis is pinned
+# in requirements.txt because of them; layers without them get plain group_send calls
+REDIS_LAYER_INTERNALS = (
+    'consistent_hash', 'connection', '_group_key', '_map_channel_keys_to_connection', 'group_expiry', 'expiry',
+)
+
+# Same per-channel capacity check and ZADD as RedisChannelLayer.group_send
+GROUP_SEND_LUA = """
+    local over_capacity = 0
+    local current_time = ARGV[#ARGV - 1]
+    local expiry = ARGV[#ARGV]
+    for i=1,#KEYS do
+        if redis.call('ZCOUNT', KEYS[i], '-inf', '+inf') < tonumber(ARGV[i + #KEYS]) then
+            redis.call('ZADD', KEYS[i], current_time, ARGV[i])
+            redis.call('EXPIRE', KEYS[i], expiry)
+        else
+            over_capacity = over_capacity + 1
+        end
+    end
+    return over_capacity
+"""
+
+
+def user_group(user_id):
+    return f'user_{user_id}'
+
+
+async def mark_online(user_id):
+    """Count an open socket of the user; several tabs keep the user online until the last one closes."""
+    key = PRESENCE_KEY.format(user_id)
+    if not await cache.aadd(key, 1, PRESENCE_TIMEOUT):
+        try:
+            count = await cache.aincr(key)
+        except ValueError:  # Expired between add and incr
+            await cache.aset(key, 1, PRESENCE_TIMEOUT)
+        else:
+            if count < 1:
+                # Closes outnumbered the counted opens after a recreated counter; this socket is open
+                await cache.aset(key, 1, PRESENCE_TIMEOUT)
+            else:
+                # incr keeps the expiry set by the first connect
+                await cache.atouch(key, PRESENCE_TIMEOUT)
+
+
+async def refresh_presence(user_id):
+    """
+    Push back the expiry of the user's presence counter; open sockets call this every
+    PRESENCE_HEARTBEAT. A counter that expired anyway is recreated for this socket.
+    """
+    key = PRESENCE_KEY.format(user_id)
+    if not await cache.aadd(key, 1, PRESENCE_TIMEOUT):
+        await cache.atouch(key, PRESENCE_TIMEOUT)
+
+
+async def mark_offline(user_id):
+    # The counter is never deleted: another tab may increment it between a decrement and a
+    # delete. At zero it reads as offline and expires on its own
+    try:
+        await cache.adecr(PRESENCE_KEY.format(user_id))
+    except ValueError:
+        pass
+
+
+async def online_user_ids(user_ids):
+    """Filter user ids down to those with an open socket, with one multi-get on the cache."""
+    user_ids = list(dict.fromkeys(user_ids))
+    # BaseCache.aget_many awaits one get per key, so the blocking get_many (a single MGET on Redis) is used
+    online = await sync_to_async(cache.get_many)([PRESENCE_KEY.format(user_id) for user_id in user_ids])
+    return [user_id for user_id in user_ids if online.get(PRESENCE_KEY.format(user_id), 0) > 0]
+
+
+def supports_group_send_many(channel_layer):
+    return isinstance(channel_layer, RedisChannelLayer) and all(
+        hasattr(channel_layer, name) for name in REDIS_LAYER_INTERNALS
+    )
+
+
+async def redis_group_send_many(channel_layer, groups, message):
+    """
+    group_send to many groups of a RedisChannelLayer at once: group members are read
+    with one pipeline per Redis host, and messages are queued with one Lua call per
+    batch of channels instead of four round trips per group.
+    """
+    groups_by_connection = defaultdict(list)
+    for group in groups:
+        groups_by_connection[channel_layer.consistent_hash(group)].append(group)
+
+    channel_names = {}
+    for index, connection_groups in groups_by_connection.items():
+        pipe = channel_layer.connection(index).pipeline(transaction=False)
+        for group in connection_groups:
+            key = channel_layer._group_key(group)
+            pipe.zremrangebyscore(key, min=0, max=int(time.time()) - channel_layer.group_expiry)
+            pipe.zrange(key, 0, -1)
+        members = await pipe.execute()
+        for group_channels in members[1::2]:
+            channel_names.update(dict.fromkeys(channel.decode('utf8') for channel in group_channels))
+    if not channel_names:
+        return
+
+    connection_to_keys, key_to_message, key_to_capacity = channel_layer._map_channel_keys_to_connection(
+        list(channel_names), message,
+    )
+    for index, channel_keys in connection_to_keys.items():
+        connection = channel_layer.connection(index)
+        for start in range(0, len(channel_keys), FANOUT_BATCH_SIZE):
+            keys = channel_keys[start:start + FANOUT_BATCH_SIZE]
+            pipe = connection.pipeline(transaction=False)
+            for key in keys:
+                pipe.zremrangebyscore(key, min=0, max=int(time.time()) - int(channel_layer.expiry))
+            await pipe.execute()
+            args = [key_to_message[key] for key in keys] + [key_to_capacity[key] for key in keys]
+            await connection.eval(GROUP_SEND_LUA, len(keys), *keys, *args, time.time(), channel_layer.expiry)
+
+
+async def fan_out(user_ids, event, channel_layer=None):
+    """
+    Deliver a channel layer event to the personal groups of the given users that
+    are online. Returns the number of groups sent to.
+    """
+    channel_layer = channel_layer or get_channel_layer()
+    recipients = await online_user_ids(user_ids)
+    groups = [user_group(user_id) for user_id in recipients]
+    if supports_group_send_many(channel_layer):
+        await redis_group_send_many(channel_layer, groups, event)
+    else:
+        for start in range(0, len(groups), FANOUT_BATCH_SIZE):
+            batch = groups[start:start + FANOUT_BATCH_SIZE]
+            await asyncio.gather(*(channel_layer.group_send(group, event) for group in batch))
+    return len(recipients)
+
+
+def wire_frame(message_data):
+    """
+    Encode a serialized message once as the socket frame every recipient gets. The
+    receiver list is left out, so broadcast payloads do not grow with their audience,
+    and so is the count inbox serializations add, so replayed frames match live ones.
+    """
+    return json.dumps({'message': {
+        key: value for key, value in message_data.items() if key not in ('receivers', 'receivers_count')
+    }})
+
+
+async def dispatch_message(message_data, user_ids, channel_layer=None):
+    """
+    Send a serialized message to the online users among `user_ids` in one fan-out; the
+    frame is encoded here once and passed through by ChatConsumer.chat_message as is.
+    Returns the number of groups sent to.
+    """
+    event = {'type': 'chat_message', 'text': wire_frame(message_data)}
+    return await fan_out(user_ids, event, channel_layer=channel_layer)
+
+
+def dispatch_message_sync(message_data, user_ids, channel_layer=None):
+    return async_to_sync(dispatch_message)(message_data, user_ids, channel_layer)
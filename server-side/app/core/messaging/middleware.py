@@ -6,7 +6,10 @@ from django.db import close_old_connections
 from django.contrib.auth import get_user_model
 from channels.db import database_sync_to_async
 from rest_framework_simplejwt.exceptions import TokenError
+from core.auth.authentication import ClaimsUser, has_user_claims
+from django.conf import settings
 from core.models._User import User
+from core.messaging.user_cache import resolved_users
 
 import logging
 
@@ -19,7 +22,7 @@ class JwtAuthMiddleware(BaseMiddleware):
         if token:
             try:
                 access_token = AccessToken(token)
-                user = await self.get_user(access_token)
+                user = await self.resolve_user(access_token)
                 scope['user'] = user
                 logger.info(f"Authenticated WebSocket user: {user}")
             except Exception as e:
@@ -31,15 +34,37 @@ class JwtAuthMiddleware(BaseMiddleware):
 
         return await super().__call__(scope, receive, send)
 
+    async def resolve_user(self, access_token):
+        """
+        Build the scope user from the token's signed claims when WS_CLAIMS_USER is on and
+        the token carries them; otherwise load it, going to the database only on a cache miss.
+        """
+        if settings.WS_CLAIMS_USER and has_user_claims(access_token):
+            return ClaimsUser(access_token)
+
+        user_id = access_token.get("user_id")
+        jti = access_token.get("jti")
+        version = await resolved_users.version(user_id)
+        user = resolved_users.get(user_id, jti, version)
+        if user is None:
+            user = await self.get_user(access_token)
+            if user.is_authenticated:
+                resolved_users.set(user_id, jti, version, user)
+        return user
+
     @database_sync_to_async
     def get_user(self, access_token):
         close_old_connections()
         user_id = access_token.get("user_id")
         try:
-            return User.objects.get(id=user_id)
+            user = User.objects.get(id=user_id)
         except User.DoesNotExist:
             logger.error(f"User with ID {user_id} not found.")
             return AnonymousUser()
+        if not user.is_active:
+            logger.warning(f"User with ID {user_id} is inactive.")
+            return AnonymousUser()
+        return user
 
 async def __call__(self, scope, receive, send):
     query_string = parse_qs(scope["query_string"].decode())
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from core.models._User import User
 from core.messaging._Message import Message
-from core.messaging._Message import Chat
+from core.messaging._Message import Chat, ReadWatermark
 from django.db import models
 
 class UserSerializer(serializers.ModelSerializer):
@@ -31,9 +31,13 @@ class MessageSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_seen(self, obj):
+        if hasattr(obj, 'seen_by_user'):
+            return obj.seen_by_user  # Annotated by Message.objects.with_inbox_fields()
         request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            return request.user in obj.is_seen.all()
+        if request and hasattr(request, 'user') and request.user.is_authenticated:
+            return ReadWatermark.objects.for_stream(request.user, obj.chat_id).filter(
+                last_read_message_id__gte=obj.pk,
+            ).exists()
         return False
 
     def validate(self, data):
@@ -43,6 +47,29 @@ class MessageSerializer(serializers.ModelSerializer):
         return data
 
 
+class InboxMessageSerializer(MessageSerializer):
+    """
+    Message as listed in an inbox stream. Expects a queryset from
+    Message.objects.with_inbox_fields(); the receiver list is only included when
+    `include_receivers` is set in the context, from a preview prefetched into
+    `receivers_preview`.
+    """
+    receivers = serializers.SerializerMethodField()
+    receivers_count = serializers.IntegerField(read_only=True)
+
+    class Meta(MessageSerializer.Meta):
+        fields = MessageSerializer.Meta.fields + ['receivers_count']
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get('include_receivers'):
+            fields.pop('receivers')
+        return fields
+
+    def get_receivers(self, obj):
+        return UserSerializer(obj.receivers_preview, many=True).data
+
+
 class SendMessageResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
     data = MessageSerializer()
@@ -67,7 +94,10 @@ class ChatSerializer(serializers.ModelSerializer):
     def get_messages(self, obj):
         """Include messages in the chat if requested."""
         if self.context.get('include_messages'):
-            messages = obj.messages.all().order_by('-timestamp')
+            messages = obj.messages.select_related('sender').order_by('-timestamp')
+            request = self.context.get('request')
+            if request and request.user.is_authenticated:
+                messages = messages.with_seen_flag(request.user)
             return MessageSerializer(messages, many=True, context=self.context).data
         return None
 
@@ -88,3 +118,16 @@ class ChatSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Chat between these users already exists.")
         
         return data
+
+
+class ChatPreviewSerializer(serializers.ModelSerializer):
+    """Chat list entry; expects a queryset from Chat.objects.with_previews()."""
+    participant1 = UserSerializer(read_only=True)
+    participant2 = UserSerializer(read_only=True)
+    last_message = serializers.JSONField(read_only=True)
+    last_activity = serializers.DateTimeField(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Chat
+        fields = ['id', 'participant1', 'participant2', 'created_at', 'last_message', 'last_activity', 'unread_count']
@@ -0,0 +1,73 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+
+USER_VERSION_KEY = 'messaging:user-version:{}'
+
+
+class ResolvedUserCache:
+    """
+    Process-local LRU cache of users resolved from access tokens, keyed by
+    (user_id, jti) with a TTL. Each entry records the user's version from the
+    shared cache when it was loaded; invalidate_user replaces that version, so
+    every process drops the user's entries on their next lookup.
+    """
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id, jti):
+        # Tokens carry the user id as a string
+        return (str(user_id), jti)
+
+    async def version(self, user_id):
+        """The user's current version; read it before loading the user so a change made meanwhile is not missed."""
+        return await cache.aget(USER_VERSION_KEY.format(user_id))
+
+    def get(self, user_id, jti, version):
+        key = self.key(user_id, jti)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            user, entry_version, expires_at = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return user
+
+    def set(self, user_id, jti, version, user):
+        key = self.key(user_id, jti)
+        with self.lock:
+            self.entries[key] = (user, version, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            self.keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate_user(self, user_id):
+        # A fresh random version never matches an older entry. It only has to outlive the
+        # entries: one cached while the key was missing expires before the key does
+        cache.set(USER_VERSION_KEY.format(user_id), uuid.uuid4().hex, self.ttl)
+        with self.lock:
+            for key in self.keys_by_user.pop(str(user_id), ()):
+                self.entries.pop(key, None)
+
+    def _remove(self, key):
+        self.entries.pop(key, None)
+        keys = self.keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_user[key[0]]
+
+
+resolved_users = ResolvedUserCache(settings.WS_USER_CACHE_SIZE, settings.WS_USER_CACHE_TTL)
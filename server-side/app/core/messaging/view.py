@@ -3,13 +3,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from core.messaging._Message import Message
-from core.messaging.serializer import MessageSerializer, ChatSerializer
-from django.db.models import Q
+from core.messaging.serializer import MessageSerializer, ChatSerializer, ChatPreviewSerializer, InboxMessageSerializer
+from django.db.models import Prefetch, Q
 from core.models._User import User
-from core.messaging._Message import Chat
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from core.messaging._Message import Chat, ReadWatermark
 from django.shortcuts import get_object_or_404
+from core.pagination import ChatPreviewCursorPagination, InboxCursorPagination, MessageCursorPagination
+from core.messaging.fanout import dispatch_message_sync
+from core.auth.authentication import ClaimsJWTAuthentication
 
 
 class SendMessageView(APIView):
@@ -27,21 +28,13 @@ class SendMessageView(APIView):
                 return Response({"error": "Chat ID and content are required for direct messages."}, status=status.HTTP_400_BAD_REQUEST)
             try:
                 chat = Chat.objects.get(id=chat_id)
-                if sender not in [chat.participant1, chat.participant2]:
+                if sender.id not in [chat.participant1_id, chat.participant2_id]:
                     return Response({"error": "You are not a participant in this chat."}, status=status.HTTP_403_FORBIDDEN)
                 message = Message.objects.create(sender=sender, chat=chat, message_type='direct', content=content)
 
-                # Notify WebSocket group
-                channel_layer = get_channel_layer()
-                serializer = MessageSerializer(message, context={'request': request})
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{chat.participant1.id}",  # Notify participant1
-                    {"type": "chat_message", "message": serializer.data}
-                )
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{chat.participant2.id}",  # Notify participant2
-                    {"type": "chat_message", "message": serializer.data}
-                )
+                # Serialized once for both participants' sockets and the response
+                message_data = MessageSerializer(message, context={'request': request}).data
+                dispatch_message_sync(message_data, [chat.participant1_id, chat.participant2_id])
             except Chat.DoesNotExist:
                 return Response({"error": "Chat not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -51,43 +44,113 @@ class SendMessageView(APIView):
             if not receivers or not content:
                 return Response({"error": "Receivers and content are required for broadcast messages."}, status=status.HTTP_400_BAD_REQUEST)
             message = Message.objects.create(sender=sender, message_type='broadcast', content=content)
-            message.receivers.set(User.objects.filter(id__in=receivers))
-
-            # Notify WebSocket broadcast group
-            channel_layer = get_channel_layer()
-            serializer = MessageSerializer(message, context={'request': request})
-            async_to_sync(channel_layer.group_send)(
-                "broadcast",  # Broadcast to the 'broadcast' group
-                {"type": "chat_message", "message": serializer.data}
-            )
+            receiver_ids = list(User.objects.filter(id__in=receivers).values_list('id', flat=True))
+            message.receivers.set(receiver_ids)
+
+            # Notify the receivers (and the sender's other sockets) through their own groups
+            message_data = MessageSerializer(message, context={'request': request}).data
+            dispatch_message_sync(message_data, receiver_ids + [sender.id])
         else:
             return Response({"error": "Invalid message type."}, status=status.HTTP_400_BAD_REQUEST)
 
-        response_data = MessageSerializer(message, context={'request': request}).data
-        return Response({"message": "Message sent successfully", "data": response_data}, status=status.HTTP_201_CREATED)
+        return Response({"message": "Message sent successfully", "data": message_data}, status=status.HTTP_201_CREATED)
+
+
+# Receivers listed per message when a stream is requested with ?include_receivers=true
+RECEIVERS_PREVIEW_LIMIT = 10
+
+
+def inbox_messages(queryset, request, all_receivers=False):
+    """
+    Prepare a message stream for InboxMessageSerializer: sender, seen flag and receiver
+    count come from the main query, and the optional receiver preview from one prefetch.
+    With all_receivers every receiver is listed and ?include_receivers defaults to true,
+    which keeps the shape the legacy /api/messages/ endpoint has always returned.
+    """
+    default = 'true' if all_receivers else 'false'
+    include_receivers = request.query_params.get('include_receivers', default).lower() == 'true'
+    queryset = queryset.with_inbox_fields(request.user)
+    if include_receivers:
+        receivers = User.objects.order_by('id')
+        if not all_receivers:
+            receivers = receivers[:RECEIVERS_PREVIEW_LIMIT]
+        queryset = queryset.prefetch_related(Prefetch('receivers', queryset=receivers, to_attr='receivers_preview'))
+    return queryset, {'request': request, 'include_receivers': include_receivers}
 
 
 class RetrieveMessagesView(APIView):
     permission_classes = [IsAuthenticated]
+    # These read views only use the user's id, so the token's signed claims stand in for the user row
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
         user = request.user
 
-        # Query messages
-        received_messages = Message.objects.filter(receivers=user).order_by('-timestamp')  # Optional: Order by timestamp
-        sent_messages = Message.objects.filter(sender=user).order_by('-timestamp')  # Optional: Order by timestamp
-        unseen_count = received_messages.exclude(is_seen=user).count()
+        # Receivers stay in by default for the existing client; ?include_receivers=false drops them
+        received_messages, context = inbox_messages(
+            Message.objects.received_by(user).order_by('-timestamp', '-id'), request, all_receivers=True
+        )
+        sent_messages, _ = inbox_messages(
+            Message.objects.sent_by(user).order_by('-timestamp', '-id'), request, all_receivers=True
+        )
+        unseen_count = Message.objects.received_by(user).unseen_by(user).count()
+
+        # Each stream has its own cursor so they can be paged independently.
+        # Pagination is opt-in (?paginate=true); without it both lists are returned whole.
+        received_paginator = MessageCursorPagination()
+        received_paginator.cursor_query_param = 'received_cursor'
+        sent_paginator = MessageCursorPagination()
+        sent_paginator.cursor_query_param = 'sent_cursor'
+
+        received_page = received_paginator.paginate_queryset(received_messages, request, view=self)
+        sent_page = sent_paginator.paginate_queryset(sent_messages, request, view=self)
 
-        # Serialize data without pagination
         data = {
-            "received_messages": MessageSerializer(received_messages, many=True, context={'request': request}).data,
-            "sent_messages": MessageSerializer(sent_messages, many=True, context={'request': request}).data,
+            "received_messages": InboxMessageSerializer(
+                received_messages if received_page is None else received_page, many=True, context=context
+            ).data,
+            "sent_messages": InboxMessageSerializer(
+                sent_messages if sent_page is None else sent_page, many=True, context=context
+            ).data,
             "unseen_count": unseen_count
         }
+        if received_page is not None:
+            data["received_next"] = received_paginator.get_next_link()
+            data["received_previous"] = received_paginator.get_previous_link()
+        if sent_page is not None:
+            data["sent_next"] = sent_paginator.get_next_link()
+            data["sent_previous"] = sent_paginator.get_previous_link()
 
         return Response(data, status=status.HTTP_200_OK)
 
 
+class ReceivedMessagesView(APIView):
+    """Keyset-paginated stream of the messages the user received, newest first."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request):
+        user = request.user
+        messages, context = inbox_messages(Message.objects.received_by(user), request)
+        paginator = InboxCursorPagination()
+        page = paginator.paginate_queryset(messages, request, view=self)
+        response = paginator.get_paginated_response(InboxMessageSerializer(page, many=True, context=context).data)
+        response.data["unseen_count"] = Message.objects.received_by(user).unseen_by(user).count()
+        return response
+
+
+class SentMessagesView(APIView):
+    """Keyset-paginated stream of the messages the user sent, newest first."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request):
+        messages, context = inbox_messages(Message.objects.sent_by(request.user), request)
+        paginator = InboxCursorPagination()
+        page = paginator.paginate_queryset(messages, request, view=self)
+        return paginator.get_paginated_response(InboxMessageSerializer(page, many=True, context=context).data)
+
+
 class DeleteMessageView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -142,6 +205,7 @@ class CreateChatView(APIView):
 
 class ListChatsForUserView(APIView):
     permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request, user_id=None):
         # If user_id is not provided, use the logged-in user
@@ -150,9 +214,16 @@ class ListChatsForUserView(APIView):
         if not user:
             return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
 
+        # Sidebar mode: latest message, unread count and last activity per chat, newest first
+        if request.query_params.get('preview', 'false').lower() == 'true':
+            chats = Chat.objects.for_user(user).with_previews(user)
+            paginator = ChatPreviewCursorPagination()
+            page = paginator.paginate_queryset(chats, request, view=self)
+            return paginator.get_paginated_response(ChatPreviewSerializer(page, many=True).data)
+
         # Fetch all chats where the user is a participant
         chats = Chat.objects.filter(
-            Q(participant1=user) | Q(participant2=user)
+            Q(participant1=user.id) | Q(participant2=user.id)
         )
         include_messages = request.query_params.get('include_messages', 'false').lower() == 'true'
         serializer_context = {'request': request, 'include_messages': include_messages}
@@ -168,7 +239,7 @@ class RetrieveChatView(APIView):
             chat = Chat.objects.get(id=chat_id)
 
             # Ensure the requesting user is a participant in the chat
-            if request.user not in [chat.participant1, chat.participant2]:
+            if request.user.id not in [chat.participant1_id, chat.participant2_id]:
                 return Response({"error": "You are not a participant in this chat."}, status=status.HTTP_403_FORBIDDEN)
 
             # Include messages in the response
@@ -182,6 +253,63 @@ class RetrieveChatView(APIView):
         except Chat.DoesNotExist:
             return Response({"error": "Chat not found."}, status=status.HTTP_404_NOT_FOUND)
         
+# Messages returned per chat history page, by default and at most
+CHAT_HISTORY_LIMIT = 50
+CHAT_HISTORY_MAX_LIMIT = 200
+
+
+class ChatHistoryView(APIView):
+    """
+    One page of a chat's messages, newest first. `?before=` pages back from a message
+    id or timestamp, `?after=` forward; `limit` defaults to 50 (at most 200). Pages are
+    range scans on the (chat, timestamp, id) index, so their cost does not depend on
+    the chat's length.
+    """
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request, chat_id):
+        chat = get_object_or_404(Chat, id=chat_id)
+        if request.user.id not in [chat.participant1_id, chat.participant2_id]:
+            return Response({"error": "You are not a participant in this chat."}, status=status.HTTP_403_FORBIDDEN)
+
+        before = request.query_params.get('before')
+        after = request.query_params.get('after')
+        if before and after:
+            return Response({"error": "Use either before or after, not both."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', CHAT_HISTORY_LIMIT))
+        except ValueError:
+            return Response({"error": "Limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, CHAT_HISTORY_MAX_LIMIT))
+
+        messages = Message.objects.filter(chat=chat)
+        try:
+            if after:
+                messages = messages.after(*messages.position(after)).order_by('timestamp', 'id')
+            elif before:
+                messages = messages.before(*messages.position(before)).order_by('-timestamp', '-id')
+            else:
+                messages = messages.order_by('-timestamp', '-id')
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One extra row tells whether there is more in the requested direction
+        messages, context = inbox_messages(messages, request)
+        page = list(messages[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        if after:
+            page.reverse()
+
+        return Response({
+            "messages": InboxMessageSerializer(page, many=True, context=context).data,
+            "has_more": has_more,
+            "oldest_id": page[-1].id if page else None,
+            "newest_id": page[0].id if page else None,
+        }, status=status.HTTP_200_OK)
+
+
 class MarkMessagesAsReadView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -189,26 +317,21 @@ class MarkMessagesAsReadView(APIView):
         user = request.user
 
         if chat_id == 'broadcast':
-            # For broadcast messages
-            messages = Message.objects.filter(
-                message_type='broadcast',
-                receivers=user,
-            ).exclude(is_seen=user)
+            # For broadcast messages; direct messages may list receivers too, but their
+            # chats keep their own watermarks
+            messages = Message.objects.received_by(user).filter(chat__isnull=True)
         else:
             # For direct messages
             chat = get_object_or_404(Chat, id=chat_id)
-            if user not in [chat.participant1, chat.participant2]:
+            if user.id not in [chat.participant1_id, chat.participant2_id]:
                 return Response(
                     {"error": "You are not a participant in this chat."},
                     status=status.HTTP_403_FORBIDDEN
                 )
-            messages = Message.objects.filter(
-                chat=chat
-            ).exclude(is_seen=user)
+            messages = Message.objects.filter(chat=chat)
 
-        # Mark each message as seen by the user
-        for message in messages:
-            message.is_seen.add(user)
+        # Move the user's read watermark for this stream up to its newest message
+        ReadWatermark.objects.mark_read(user, messages)
 
         return Response(
             {"message": "Messages marked as read."},
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['timestamp', 'id'], name='core_message_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['date', 'id'], name='core_tour_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tourrequestbatch',
+            index=models.Index(fields=['timestamp', 'id'], name='core_batch_timestamp_id_idx'),
+        ),
+    ]
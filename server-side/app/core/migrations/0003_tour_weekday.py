@@ -0,0 +1,21 @@
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='weekday',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.datetime.ExtractIsoWeekDay('date'), output_field=models.SmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['weekday', 'status'], name='core_tour_weekday_status_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_tour_weekday'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='guide',
+            name='free_slots',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(models.F('availability'), models.Value(1), function='array_positions', output_field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None)), output_field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), size=None)),
+        ),
+        migrations.AddIndex(
+            model_name='guide',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['free_slots'], name='core_guide_free_slots_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_seen_to_watermarks(apps, schema_editor):
+    """
+    Each user's watermark per chat (and for broadcasts) becomes the newest message
+    they had marked as seen there. Older unseen gaps below it are treated as read.
+    """
+    Message = apps.get_model('core', 'Message')
+    ReadWatermark = apps.get_model('core', 'ReadWatermark')
+    latest_seen = Message.is_seen.through.objects.values('user_id', 'message__chat_id').annotate(
+        last_read=models.Max('message_id'),
+    ).order_by()
+    ReadWatermark.objects.bulk_create(
+        (
+            ReadWatermark(user_id=row['user_id'], chat_id=row['message__chat_id'], last_read_message_id=row['last_read'])
+            for row in latest_seen.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+def copy_watermarks_to_seen(apps, schema_editor):
+    Message = apps.get_model('core', 'Message')
+    ReadWatermark = apps.get_model('core', 'ReadWatermark')
+    Seen = Message.is_seen.through
+    for watermark in ReadWatermark.objects.iterator():
+        messages = Message.objects.filter(id__lte=watermark.last_read_message_id)
+        if watermark.chat_id is None:
+            messages = messages.filter(chat__isnull=True, receivers=watermark.user_id)
+        else:
+            messages = messages.filter(chat_id=watermark.chat_id)
+        Seen.objects.bulk_create(
+            (Seen(message_id=message_id, user_id=watermark.user_id) for message_id in messages.values_list('id', flat=True)),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_message_sender_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chat', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='read_watermarks', to='core.chat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_watermarks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'chat'), name='core_readwatermark_user_chat_uniq', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(copy_seen_to_watermarks, copy_watermarks_to_seen),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_seen',
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_message_chat_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tourrequestbatch',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'approved'])), fields=['status', 'timestamp', 'id'], name='core_batch_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tour_slot_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='regrequest',
+            name='status',
+            field=models.CharField(choices=[('pending', '0'), ('approved', '1'), ('rejected', '2'), ('scheduled', '3'), ('cancelled', '4')], default='pending', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='tourrequestbatch',
+            name='status',
+            field=models.CharField(choices=[('pending', '0'), ('approved', '1'), ('rejected', '2'), ('scheduled', '3'), ('cancelled', '4')], default='pending', max_length=10),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_request_status_choices'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fair',
+            index=models.Index(fields=['date', 'id'], name='core_fair_date_id_idx'),
+        ),
+    ]
@@ -12,5 +12,11 @@ class Fair(models.Model):
     visitor = models.OneToOneField(Visitor, on_delete=models.CASCADE, related_name='fair')
     date = models.DateField(default=None)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination newest first, see FairCursorPagination
+            models.Index(fields=['date', 'id'], name='core_fair_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"Fair {self.name} at {self.schoolName}"
\ No newline at end of file
@@ -1,11 +1,47 @@
-from django.db import models
+from django.db import models, connections
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from core.models._User import User  
 from core.models._Review import Review
 
 def default_availability():
     return [0 for _ in range(28)]
 
+class GuideQuerySet(models.QuerySet):
+    """
+    Availability lookups against the indexed `free_slots` column.
+    Slot indices are `day * 4 + slot` (0-27), the same as `availability`.
+    """
+    def available_at(self, index):
+        return self.filter(free_slots__contains=[index + 1])
+
+    def available_in_any(self, indices):
+        return self.filter(free_slots__overlap=[index + 1 for index in indices])
+
+    def available_in_all(self, indices):
+        return self.filter(free_slots__contains=[index + 1 for index in indices])
+
+    def set_slots(self, pk, changes):
+        """
+        Set availability slots of one guide in a single UPDATE that only touches the
+        given array elements, so concurrent edits of different slots cannot overwrite
+        each other. `changes` maps slot indices to 0/1. Returns the new availability,
+        or None if the guide does not exist.
+        """
+        if not changes:
+            return self.filter(pk=pk).values_list('availability', flat=True).first()
+        assignments = ', '.join('availability[%s] = %s' for _ in changes)
+        params = []
+        for index, value in changes.items():
+            params += [index + 1, value]
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.model._meta.db_table} SET {assignments} WHERE id = %s RETURNING availability',
+                params + [pk],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
 class Guide(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='guide_profile', null=True)
     rating = models.FloatField(default=0.0)
@@ -14,6 +50,25 @@ class Guide(models.Model):
         size=28, 
         default=default_availability 
     )
+    # 1-based positions of the available slots, kept in sync with `availability` by the database
+    free_slots = models.GeneratedField(
+        expression=models.Func(
+            models.F('availability'),
+            models.Value(1),
+            function='array_positions',
+            output_field=ArrayField(models.IntegerField()),
+        ),
+        output_field=ArrayField(models.IntegerField()),
+        db_persist=True,
+    )
     reviewCount = models.IntegerField(default=0)
+
+    objects = GuideQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['free_slots'], name='core_guide_free_slots_idx'),
+        ]
+
     def __str__(self):
         return f"Guide {self.user.name} with rating {self.rating} and availability {self.availability}"
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import ExtractIsoWeekDay
 from core.constants import TIME_SLOTS
 from core.models._Visitor import Visitor
 from core.models._Guide import Guide
@@ -18,6 +19,20 @@ class Tour(models.Model):
     guides = models.ManyToManyField(Guide, related_name='tours', blank=True)
     review = models.OneToOneField(Review, related_name='tours', blank=True, null=True, on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=TOUR_STATUS, default='UNASSIGNED')
+    # ISO day of week of `date` (1=Monday, 7=Sunday), stored so weekday filters can use an index
+    weekday = models.GeneratedField(
+        expression=ExtractIsoWeekDay('date'),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='core_tour_date_id_idx'),
+            models.Index(fields=['weekday', 'status'], name='core_tour_weekday_status_idx'),
+            # Occupancy counts per (date, slot), see core.scheduling.occupancy
+            models.Index(fields=['date', 'slot'], name='core_tour_date_slot_idx'),
+        ]
 
 def save(self, *args, **kwargs):
     # First save: assign PK
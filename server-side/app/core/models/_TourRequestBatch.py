@@ -10,4 +10,15 @@ class TourRequestBatch(models.Model):
     additional_notes = models.TextField(blank=True, null=True)
     number_of_visitors = models.IntegerField(default=1)
     rejection_reason = models.TextField(blank=True, null=True)
-    tour = models.OneToOneField(Tour, on_delete=models.SET_NULL, related_name='tour_request_batch', blank=True, null=True)
\ No newline at end of file
+    tour = models.OneToOneField(Tour, on_delete=models.SET_NULL, related_name='tour_request_batch', blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='core_batch_timestamp_id_idx'),
+            # Only the advisor queues filter by status; scheduled and rejected batches stay out
+            models.Index(
+                fields=['status', 'timestamp', 'id'],
+                name='core_batch_queue_idx',
+                condition=models.Q(status__in=['pending', 'approved']),
+            ),
+        ]
@@ -0,0 +1,162 @@
+import json
+import operator
+from functools import reduce
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    CursorPagination whose cursor holds the values of every ordering field, not just
+    the first one. Pages are fetched with a tuple comparison on those fields, so an
+    ordering ending in a unique field (id) never needs an OFFSET, however many rows
+    share the leading values.
+    """
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return json.dumps(values)
+
+    def keyset_filter(self, queryset, position, reverse):
+        """Rows after `position` in the ordering, or before it when reverse."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        conditions, equal = [], {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            conditions.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        # The redundant bound on the first field lets the planner start the index range there
+        first = self.ordering[0]
+        bound = 'lte' if first.startswith('-') != reverse else 'gte'
+        return queryset.filter(reduce(operator.or_, conditions), **{f'{first.lstrip("-")}__{bound}': values[0]})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset with keyset_filter in place of the first-field filter
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = self.keyset_filter(queryset, current_position, reverse)
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class OptInCursorPagination(KeysetCursorPagination):
+    """
+    Keyset (cursor) pagination that is only applied when the client asks for it.
+
+    Clients opt in with ``?paginate=true`` (or by sending a cursor), so existing
+    callers keep receiving plain lists while they migrate. Cursors are opaque and
+    every page is fetched with an indexed range scan on the ordering columns, so
+    page N costs the same as page 1.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    opt_in_query_param = 'paginate'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_requested(self, request):
+        if self.cursor_query_param in request.query_params:
+            return True
+        return request.query_params.get(self.opt_in_query_param, 'false').lower() == 'true'
+
+
+class TourCursorPagination(OptInCursorPagination):
+    ordering = ('date', 'id')
+
+
+class TourRequestBatchCursorPagination(OptInCursorPagination):
+    ordering = ('-timestamp', '-id')
+
+
+class UserCursorPagination(OptInCursorPagination):
+    ordering = ('id',)
+
+
+class GuideCursorPagination(OptInCursorPagination):
+    ordering = ('id',)
+
+
+class FairCursorPagination(OptInCursorPagination):
+    ordering = ('-date', '-id')
+
+
+class MessageCursorPagination(OptInCursorPagination):
+    ordering = ('-timestamp', '-id')
+
+
+class InboxCursorPagination(KeysetCursorPagination):
+    """Always-on keyset pagination for the received/sent message streams."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-timestamp', '-id')
+
+
+class ChatPreviewCursorPagination(KeysetCursorPagination):
+    """Chats by most recent activity; `last_activity` is annotated by Chat.objects.with_previews()."""
+    page_size = 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-last_activity', '-id')
@@ -0,0 +1,100 @@
+"""
+Approval and rejection of registration requests, one or many at a time.
+
+Both run in a single transaction with set-based writes and queue their emails to
+be sent by Celery once the transaction commits. They return a dict mapping each
+requested id to None on success or to an error message.
+"""
+from functools import partial
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from core.dashboard import invalidate_dashboard_stats
+from core.models._RegRequest import RegRequest
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.tasks import send_account_credentials, send_registration_rejection
+
+NOT_FOUND = "Registration request not found."
+EMAIL_TAKEN = "A user with this email already exists."
+
+
+def visitor_type(reg_request):
+    return "high-school" if reg_request.user_type == "high_school_counsellor" else "individual"
+
+
+def approve_registrations(ids):
+    """
+    Create a visitor user and profile per request with bulk_create and delete the
+    requests. Users start without a usable password; send_account_credentials sets
+    one and emails it after commit, so no password is hashed in the request. An email
+    taken by a concurrent transaction fails only its own request, after a retry
+    without it.
+    """
+    ids = list(dict.fromkeys(ids))
+    errors = {}
+    with transaction.atomic():
+        reg_requests = RegRequest.objects.select_for_update().in_bulk(ids)
+        emails = {pk: User.objects.normalize_email(reg_request.email) for pk, reg_request in reg_requests.items()}
+        taken = set(User.objects.filter(email__in=emails.values()).values_list('email', flat=True))
+
+        approved = []
+        for pk in ids:
+            if pk not in reg_requests:
+                errors[pk] = NOT_FOUND
+            elif emails[pk] in taken:
+                errors[pk] = EMAIL_TAKEN
+            else:
+                errors[pk] = None
+                approved.append(reg_requests[pk])
+                # A second request with the same email in this call is refused too
+                taken.add(emails[pk])
+
+        while True:
+            try:
+                with transaction.atomic():
+                    users = User.objects.bulk_create([
+                        User(email=emails[reg_request.pk], name=reg_request.name, role="visitor", password=make_password(None))
+                        for reg_request in approved
+                    ])
+                break
+            except IntegrityError:
+                # Another transaction committed a user with one of these emails after the check above
+                taken = set(User.objects.filter(
+                    email__in=[emails[reg_request.pk] for reg_request in approved]
+                ).values_list('email', flat=True))
+                if not taken:
+                    raise
+                for reg_request in approved:
+                    if emails[reg_request.pk] in taken:
+                        errors[reg_request.pk] = EMAIL_TAKEN
+                approved = [reg_request for reg_request in approved if emails[reg_request.pk] not in taken]
+        Visitor.objects.bulk_create([
+            Visitor(
+                user=user,
+                type=visitor_type(reg_request),
+                highSchoolName=reg_request.high_school_name,
+                contactNumber=reg_request.phone_no,
+            )
+            for user, reg_request in zip(users, approved)
+        ])
+        RegRequest.objects.filter(pk__in=[reg_request.pk for reg_request in approved]).delete()
+
+        for user in users:
+            transaction.on_commit(partial(send_account_credentials.delay, user.id))
+    if users:
+        # bulk_create does not send post_save, so the cached visitor counts are cleared once this commits
+        transaction.on_commit(invalidate_dashboard_stats)
+    return errors
+
+
+def reject_registrations(ids, reason):
+    """Delete the requests and queue a rejection email with the reason for each."""
+    ids = list(dict.fromkeys(ids))
+    with transaction.atomic():
+        reg_requests = RegRequest.objects.select_for_update().in_bulk(ids)
+        RegRequest.objects.filter(pk__in=list(reg_requests)).delete()
+        for reg_request in reg_requests.values():
+            transaction.on_commit(partial(
+                send_registration_rejection.delay, reg_request.email, reg_request.name, reason,
+            ))
+    return {pk: None if pk in reg_requests else NOT_FOUND for pk in ids}
@@ -0,0 +1,124 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from openpyxl import Workbook
+from core.models._Tour import Tour
+from core.models._TourReport import TourReport
+from core.models._TourRequestBatch import TourRequestBatch
+
+GUIDE_HOURS_TITLE = "Guide Working Hours"
+GUIDE_HOURS_HEADER = ["Guide Name", "Visitor Name", "Visitor High School", "Tour Starting", "Tour End", "Total Hour"]
+
+SLOT_TO_HOUR = {
+    '09.00 AM': '9.00',
+    '11.00 AM': '11.00',
+    '13.30 PM': '13.30',
+    '16.00 PM': '16.00',
+}
+
+
+TOURS_TITLE = "Tours"
+TOURS_HEADER = ["Tour ID", "Date", "Slot", "Status", "Visitor Name", "Visitor High School", "Guides"]
+
+TOUR_REQUEST_BATCHES_TITLE = "Tour Request Batches"
+TOUR_REQUEST_BATCHES_HEADER = [
+    "Batch ID", "Requested At", "Status", "Visitor Name", "Visitor High School",
+    "Number of Visitors", "Requested Slots", "Tour ID", "Additional Notes", "Rejection Reason",
+]
+
+
+def filter_date_range(queryset, field, start_date=None, end_date=None):
+    """Restrict `field` to the given bounds; a missing bound leaves that side open."""
+    if start_date is not None:
+        queryset = queryset.filter(**{f'{field}__gte': start_date})
+    if end_date is not None:
+        queryset = queryset.filter(**{f'{field}__lte': end_date})
+    return queryset
+
+
+def tour_rows(start_date=None, end_date=None, chunk_size=2000):
+    """Yield one row per tour, with its guides aggregated in the same query."""
+    tours = filter_date_range(Tour.objects.all(), 'date', start_date, end_date).order_by('date', 'id').values_list(
+        'id',
+        'date',
+        'slot',
+        'status',
+        'visitor__user__name',
+        'visitor__highSchoolName',
+    ).annotate(
+        guide_names=StringAgg('guides__user__name', ', ', ordering='guides__user__name', default=''),
+    )
+    for row in tours.iterator(chunk_size=chunk_size):
+        yield list(row)
+
+
+def tour_request_batch_rows(start_date=None, end_date=None, chunk_size=2000):
+    """Yield one row per tour request batch created in the range, with its requested slots aggregated."""
+    batches = filter_date_range(
+        TourRequestBatch.objects.all(), 'timestamp__date', start_date, end_date,
+    ).order_by('timestamp', 'id').values_list(
+        'id',
+        'timestamp',
+        'status',
+        'visitor__user__name',
+        'visitor__highSchoolName',
+        'number_of_visitors',
+        'tour_id',
+        'additional_notes',
+        'rejection_reason',
+    ).annotate(
+        requested_slots=StringAgg(
+            Concat('tour_requests__date', Value(' '), 'tour_requests__time_slot', output_field=CharField()),
+            '; ',
+            ordering=('tour_requests__date', 'tour_requests__id'),
+            default='',
+        ),
+    )
+    for batch_id, timestamp, status, name, high_school, visitors, tour_id, notes, reason, slots in batches.iterator(chunk_size=chunk_size):
+        # openpyxl rejects timezone-aware datetimes
+        requested_at = timezone.localtime(timestamp).replace(tzinfo=None)
+        yield [batch_id, requested_at, status, name, high_school, visitors, slots, tour_id, notes, reason]
+
+
+def guide_hours_rows(start_date=None, end_date=None, chunk_size=2000):
+    """
+    Yield one working-hours row per report a guide filed for a completed tour they
+    were assigned to between start_date and end_date. Everything comes from one
+    joined query read in chunks from a server-side cursor.
+    """
+    reports = filter_date_range(TourReport.objects.all(), 'tour__date', start_date, end_date).filter(
+        tour__status='COMPLETED',
+        tour__guides=F('guide'),
+    ).order_by('guide_id', 'tour__date', 'tour_id').values_list(
+        'guide__user__name',
+        'tour__visitor__user__name',
+        'tour__visitor__highSchoolName',
+        'tour__slot',
+        'finishedAtHour',
+        'finishedAtMinute',
+    )
+    for guide_name, visitor_name, high_school, slot, hour, minute in reports.iterator(chunk_size=chunk_size):
+        start_hour = SLOT_TO_HOUR[slot]
+        end_hour = hour + minute / 60
+        yield [
+            guide_name,
+            visitor_name,
+            high_school,
+            start_hour,
+            f"{hour}.{minute:02d}",
+            round(end_hour - float(start_hour), 2),
+        ]
+
+
+def write_workbook(title, header, rows, fileobj):
+    """Stream rows into an xlsx workbook in openpyxl's write-only mode; returns the row count."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(header)
+    count = 0
+    for row in rows:
+        sheet.append(row)
+        count += 1
+    workbook.save(fileobj)
+    return count
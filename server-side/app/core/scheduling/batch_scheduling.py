@@ -0,0 +1,204 @@
+"""
+Automatic scheduling of approved tour request batches.
+
+Batches go pending -> approved (an advisor reviews the request, e.g. bulk-approve)
+-> scheduled. Both the automatic scheduler and schedule_batch_slots only place
+batches that were approved; schedule_batch_slots can also move scheduled ones.
+
+Every batch lists preferred (date, slot) options in order and each slot can take
+a limited number of new tours (see core.scheduling.occupancy). Batches compete
+for slots, so the problem is modelled as a min-cost flow:
+
+    source -> batch         capacity 1
+    batch -> (date, slot)   capacity 1, costing the preference's rank
+    (date, slot) -> sink    capacity: tours the slot can still take
+
+The maximum flow schedules as many batches as capacity allows. Among those
+schedules the cost gives every first choice priority over any number of later
+ones, so the most batches get their first choice; the remaining batches get
+the best ranked option still open.
+"""
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Subquery
+from core.models._Tour import Tour
+from core.models._TourRequest import TourRequest
+from core.models._TourRequestBatch import TourRequestBatch
+from core.scheduling.flow import MinCostFlow
+from core.scheduling.occupancy import lock_slots, slot_occupancy
+
+# Batches schedule_batch_slots may (re)schedule; the automatic scheduler only takes new ones
+SCHEDULABLE_STATUSES = ('approved', 'scheduled')
+
+
+def schedule_batches(preferences, capacity):
+    """
+    Compute a batch schedule.
+
+    preferences: batch_id -> list of (rank, (date, slot)), rank 0 being the first choice
+    capacity:    (date, slot) -> number of tours the slot can still take
+
+    Returns a dict mapping batch_id to ((date, slot), rank).
+    """
+    slots = sorted(slot for slot, free in capacity.items() if free > 0)
+    batch_ids = sorted(batch_id for batch_id, options in preferences.items() if options)
+    if not slots or not batch_ids:
+        return {}
+
+    slot_node = {slot: 1 + len(batch_ids) + position for position, slot in enumerate(slots)}
+    source, sink = 0, 1 + len(batch_ids) + len(slots)
+    network = MinCostFlow(sink + 1)
+
+    # Any later choice costs more than all later-choice ranks together, so first choices win outright
+    max_rank = max(rank for options in preferences.values() for rank, _ in options)
+    later_choice_cost = len(batch_ids) * max_rank + 1
+
+    option_edges = []
+    for position, batch_id in enumerate(batch_ids):
+        node = 1 + position
+        network.add_edge(source, node, 1)
+        for rank, slot in preferences[batch_id]:
+            if slot in slot_node:
+                edge = network.add_edge(node, slot_node[slot], 1, 0 if rank == 0 else later_choice_cost + rank)
+                option_edges.append((edge, batch_id, slot, rank))
+    for slot in slots:
+        network.add_edge(slot_node[slot], sink, capacity[slot])
+
+    network.solve(source, sink)
+    return {batch_id: (slot, rank) for edge, batch_id, slot, rank in option_edges if network.flow(edge)}
+
+
+def approved_batches_in(start_date, end_date):
+    """Approved batches with at least one preferred date between start_date and end_date."""
+    in_range = TourRequest.objects.filter(date__range=(start_date, end_date)).values('batch_id')
+    return TourRequestBatch.objects.filter(status='approved', id__in=Subquery(in_range))
+
+
+def plan_batch_schedule(start_date, end_date, lock=False):
+    """
+    Build the schedule for all approved batches preferring dates between start_date and
+    end_date; options outside the range are skipped but keep their rank.
+    Returns (visitors, assignments): visitors maps each considered batch_id to its
+    visitor_id, assignments is the result of schedule_batches.
+    """
+    batches = approved_batches_in(start_date, end_date)
+    if lock:
+        list(batches.select_for_update().values_list('id', flat=True))
+    rows = TourRequest.objects.filter(batch__in=batches).order_by('batch_id', 'id').values_list(
+        'batch_id', 'batch__visitor_id', 'date', 'time_slot',
+    )
+
+    visitors, preferences = {}, defaultdict(list)
+    for batch_id, visitor_id, date, time_slot in rows:
+        visitors[batch_id] = visitor_id
+        preferences[batch_id].append((date, time_slot))
+
+    ranked = {
+        batch_id: [
+            (rank, option) for rank, option in enumerate(dict.fromkeys(options))
+            if start_date <= option[0] <= end_date
+        ]
+        for batch_id, options in preferences.items()
+    }
+
+    pairs = {option for options in ranked.values() for _, option in options}
+    if lock:
+        # Holds off single schedules into these slots until the batch schedule is stored
+        lock_slots(pairs)
+    occupancy = slot_occupancy(pairs)
+    capacity = {pair: slot['free_capacity'] for pair, slot in occupancy.items()}
+    return visitors, schedule_batches(ranked, capacity)
+
+
+def apply_batch_schedule(start_date, end_date):
+    """
+    Compute the schedule and store it in one transaction: one tour per scheduled batch,
+    created in bulk and linked to its batch, whose status becomes 'scheduled'.
+    Returns (visitors, assignments, tour_ids) with tour_ids mapping batch_id to tour id.
+    """
+    with transaction.atomic():
+        visitors, assignments = plan_batch_schedule(start_date, end_date, lock=True)
+        batch_ids = sorted(assignments)
+        tours = Tour.objects.bulk_create([
+            Tour(date=assignments[batch_id][0][0], slot=assignments[batch_id][0][1], visitor_id=visitors[batch_id])
+            for batch_id in batch_ids
+        ])
+        tour_ids = {batch_id: tour.id for batch_id, tour in zip(batch_ids, tours)}
+        TourRequestBatch.objects.bulk_update(
+            [TourRequestBatch(id=batch_id, tour_id=tour_ids[batch_id], status='scheduled') for batch_id in batch_ids],
+            ['tour', 'status'],
+            batch_size=1000,
+        )
+    return visitors, assignments, tour_ids
+
+
+def schedule_batch_slots(items):
+    """
+    Schedule batches into given (date, slot) pairs in one transaction. items lists
+    (batch_id, date, slot) with distinct batch ids; approved batches are scheduled and
+    scheduled ones moved, while pending batches must be approved first, as for the
+    automatic scheduler. Items are placed in order while their slot has capacity, and
+    a batch leaving its slot gives that capacity to the items after it; batches that
+    only fit by trading slots with each other are moved together. A batch moving
+    within its own slot keeps its place. Placed batches lose their previous tour, get
+    a new one created in bulk and become 'scheduled'.
+    Returns a dict mapping each batch_id to None or an error message, in item order.
+    """
+    errors, pending, placed = {}, [], []
+    with transaction.atomic():
+        batches = TourRequestBatch.objects.select_for_update(of=('self',)).select_related('tour').in_bulk(
+            [batch_id for batch_id, _, _ in items]
+        )
+        for batch_id, date, slot in items:
+            batch = batches.get(batch_id)
+            if batch is None:
+                errors[batch_id] = "Tour request batch not found."
+            elif batch.status not in SCHEDULABLE_STATUSES:
+                errors[batch_id] = f"Cannot schedule a batch that is {batch.status}."
+            else:
+                pending.append((batch, (date, slot)))
+
+        current = {batch.id: (batch.tour.date, batch.tour.slot) for batch, _ in pending if batch.tour}
+        pairs = [pair for _, pair in pending] + list(current.values())
+        lock_slots(pairs)
+        capacity = {pair: slot['free_capacity'] for pair, slot in slot_occupancy(pairs).items()}
+
+        def fits(batch, pair):
+            return current.get(batch.id) == pair or capacity[pair] > 0
+
+        def place(batch, pair):
+            if current.get(batch.id) != pair:
+                capacity[pair] -= 1
+                if batch.id in current:
+                    capacity[current[batch.id]] += 1
+            errors[batch.id] = None
+            placed.append((batch, pair))
+
+        # Always the first item that fits, so capacity freed by a move goes to the earliest waiting item
+        while True:
+            position = next((position for position, (batch, pair) in enumerate(pending) if fits(batch, pair)), None)
+            if position is None:
+                break
+            place(*pending.pop(position))
+
+        # What is left only fits if it moves at once, e.g. two batches swapping full slots
+        change = Counter()
+        for batch, pair in pending:
+            change[pair] -= 1
+            if batch.id in current:
+                change[current[batch.id]] += 1
+        swappable = all(capacity[pair] + delta >= 0 for pair, delta in change.items())
+        for batch, pair in pending:
+            if swappable:
+                place(batch, pair)
+            else:
+                errors[batch.id] = "This time slot is fully booked."
+
+        Tour.objects.filter(id__in=[batch.tour_id for batch, _ in placed if batch.tour_id]).delete()
+        tours = Tour.objects.bulk_create([
+            Tour(date=date, slot=slot, visitor_id=batch.visitor_id) for batch, (date, slot) in placed
+        ])
+        for (batch, _), tour in zip(placed, tours):
+            batch.tour, batch.status = tour, 'scheduled'
+        TourRequestBatch.objects.bulk_update([batch for batch, _ in placed], ['tour', 'status'], batch_size=1000)
+    return {batch_id: errors[batch_id] for batch_id, _, _ in items}
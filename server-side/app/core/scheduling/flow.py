@@ -0,0 +1,131 @@
+import heapq
+
+INF = float('inf')
+
+
+class MinCostFlow:
+    """
+    Min-cost max-flow over integer capacities and non-negative integer costs.
+
+    Uses the primal-dual method: a Dijkstra pass with node potentials finds the
+    current shortest path cost, then Dinic-style blocking flows push as much flow
+    as possible along every path of that cost before the next pass. The scheduling
+    graphs built on top of this only have a few distinct path costs, so a whole
+    semester is solved in a handful of Dijkstra passes instead of one per unit.
+    """
+
+    def __init__(self, node_count):
+        self.node_count = node_count
+        self.graph = [[] for _ in range(node_count)]
+        self.to = []
+        self.cap = []
+        self.cost = []
+
+    def add_edge(self, u, v, capacity, cost=0):
+        """Add a directed edge and return its id; its reverse edge is `id ^ 1`."""
+        edge = len(self.to)
+        self.to += [v, u]
+        self.cap += [capacity, 0]
+        self.cost += [cost, -cost]
+        self.graph[u].append(edge)
+        self.graph[v].append(edge + 1)
+        return edge
+
+    def flow(self, edge):
+        """Flow currently sent through `edge`."""
+        return self.cap[edge ^ 1]
+
+    def solve(self, source, sink):
+        """Send the maximum flow from source to sink at minimum cost; returns (flow, cost)."""
+        potential = [0] * self.node_count
+        total_flow = total_cost = 0
+        while True:
+            distance = self._shortest_distances(source, sink, potential)
+            sink_distance = distance[sink]
+            if sink_distance == INF:
+                break
+            for node in range(self.node_count):
+                potential[node] += min(distance[node], sink_distance)
+            pushed = self._blocking_flow(source, sink, potential)
+            total_flow += pushed
+            total_cost += pushed * (potential[sink] - potential[source])
+        return total_flow, total_cost
+
+    def _shortest_distances(self, source, sink, potential):
+        to, cap, cost, graph = self.to, self.cap, self.cost, self.graph
+        distance = [INF] * self.node_count
+        distance[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > distance[u]:
+                continue
+            if u == sink:
+                # Every node closer than the sink is settled; the rest are clamped to it.
+                break
+            base = d + potential[u]
+            for edge in graph[u]:
+                if cap[edge] > 0:
+                    v = to[edge]
+                    nd = base + cost[edge] - potential[v]
+                    if nd < distance[v]:
+                        distance[v] = nd
+                        heapq.heappush(heap, (nd, v))
+        return distance
+
+    def _admissible(self, edge, u, potential):
+        return self.cap[edge] > 0 and self.cost[edge] + potential[u] == potential[self.to[edge]]
+
+    def _blocking_flow(self, source, sink, potential):
+        """Push flow along zero reduced-cost edges until the sink is unreachable through them."""
+        to, cap, graph = self.to, self.cap, self.graph
+        total = 0
+        while True:
+            level = [-1] * self.node_count
+            level[source] = 0
+            queue = [source]
+            for u in queue:
+                for edge in graph[u]:
+                    v = to[edge]
+                    if level[v] < 0 and self._admissible(edge, u, potential):
+                        level[v] = level[u] + 1
+                        queue.append(v)
+            if level[sink] < 0:
+                return total
+
+            position = [0] * self.node_count
+            while True:
+                pushed = self._augment(source, sink, level, position, potential)
+                if not pushed:
+                    break
+                total += pushed
+
+    def _augment(self, source, sink, level, position, potential):
+        to, cap, graph = self.to, self.cap, self.graph
+        path = []
+        u = source
+        while u != sink:
+            edges = graph[u]
+            while position[u] < len(edges):
+                edge = edges[position[u]]
+                v = to[edge]
+                if level[v] == level[u] + 1 and self._admissible(edge, u, potential):
+                    break
+                position[u] += 1
+            else:
+                # Dead end: drop the node from this level graph and backtrack.
+                if u == source:
+                    return 0
+                level[u] = -1
+                edge = path.pop()
+                u = to[edge ^ 1]
+                position[u] += 1
+                continue
+            path.append(edge)
+            u = to[edge]
+
+        pushed = min(cap[edge] for edge in path)
+        for edge in path:
+            cap[edge] -= pushed
+            cap[edge ^ 1] += pushed
+        return pushed
@@ -0,0 +1,163 @@
+"""
+Automatic guide-to-tour assignment.
+
+Tours that share a (date, slot) are interchangeable for a guide, so the problem
+is modelled as a min-cost flow from (date, slot) groups to guides:
+
+    source -> (date, slot)  capacity: guides still needed by the tours in that slot
+    (date, slot) -> guide   capacity 1, if the guide is available that weekday/slot
+                            and not already on another tour at that date and slot,
+                            costing how many stars the guide's rating is below the best
+    guide -> sink           one unit edge per extra tour, costing the guide's load
+                            at that point, so work is spread as evenly as possible
+
+The maximum flow staffs as many tours as availability allows; its minimum cost
+balances the load across guides, taking assignments they already have in the
+date range into account. Load costs are scaled above the largest possible total
+rating cost, so rating only decides between assignments that are equally balanced
+and then favours the higher rated guides.
+"""
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count
+from core.constants import TIME_SLOTS
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.scheduling.flow import MinCostFlow
+
+SLOTS_PER_DAY = 4
+SLOT_INDEX = {slot: int(index) for slot, index in TIME_SLOTS}
+
+
+def availability_index(date, slot_index):
+    """Index into Guide.availability for a date and slot (days start on Monday)."""
+    return date.weekday() * SLOTS_PER_DAY + slot_index
+
+
+def assign_guides(tours, guides, busy=None, load=None):
+    """
+    Compute guide assignments.
+
+    tours:  iterable of (tour_id, date, slot_index, guides_needed)
+    guides: iterable of (guide_id, available_indices, rating)
+    busy:   guide_id -> set of (date, slot_index) the guide is already booked for
+    load:   guide_id -> number of tours the guide already has in the period
+
+    Returns a dict mapping tour_id to the list of guide ids assigned to it.
+    """
+    busy = busy or {}
+    load = load or {}
+
+    groups = defaultdict(list)
+    for tour_id, date, slot_index, needed in tours:
+        if needed > 0:
+            groups[(date, slot_index)].append((tour_id, needed))
+    if not groups:
+        return {}
+
+    # Highest rated first so they are tried first within the same whole star
+    guides = sorted(guides, key=lambda guide: -guide[2])
+    # Whole stars keep the number of distinct path costs, and so Dijkstra passes, small
+    best_rating = max((rating for _, _, rating in guides), default=0)
+    rating_costs = [round(best_rating - rating) for _, _, rating in guides]
+    group_keys = sorted(groups)
+    group_count, guide_count = len(group_keys), len(guides)
+    source, sink = 0, 1 + group_count + guide_count
+    network = MinCostFlow(sink + 1)
+
+    group_by_index = defaultdict(list)
+    total_demand = 0
+    for position, (date, slot_index) in enumerate(group_keys):
+        node = 1 + position
+        demand = sum(needed for _, needed in groups[(date, slot_index)])
+        network.add_edge(source, node, demand)
+        group_by_index[availability_index(date, slot_index)].append((node, (date, slot_index)))
+        total_demand += demand
+    # One unit of load must outweigh any mix of ratings, so balance always comes first
+    load_weight = total_demand * max(rating_costs, default=0) + 1
+
+    slot_edges = []
+    for position, (guide_id, available_indices, _rating) in enumerate(guides):
+        rating_cost = rating_costs[position]
+        node = 1 + group_count + position
+        guide_busy = busy.get(guide_id, ())
+        eligible = 0
+        for index in available_indices:
+            for group_node, key in group_by_index.get(index, ()):
+                if key not in guide_busy:
+                    edge = network.add_edge(group_node, node, 1, rating_cost)
+                    slot_edges.append((edge, key, guide_id))
+                    eligible += 1
+        current = load.get(guide_id, 0)
+        for extra in range(eligible):
+            network.add_edge(node, sink, 1, (current + extra) * load_weight)
+
+    network.solve(source, sink)
+
+    chosen = defaultdict(list)
+    for edge, key, guide_id in slot_edges:
+        if network.flow(edge):
+            chosen[key].append(guide_id)
+
+    assignments = {}
+    for key, guide_ids in chosen.items():
+        # Fill tours one at a time so a shortage leaves as few tours understaffed as possible
+        remaining = iter(guide_ids)
+        for tour_id, needed in sorted(groups[key]):
+            assigned = [guide_id for _, guide_id in zip(range(needed), remaining)]
+            if assigned:
+                assignments[tour_id] = assigned
+    return assignments
+
+
+def plan_guide_assignment(start_date, end_date, guides_per_tour=1, lock=False):
+    """
+    Build the assignment for all UNASSIGNED tours between start_date and end_date.
+    Returns (tours, assignments) where tours maps tour_id to the guides it still needs.
+    """
+    tour_filter = {'status': 'UNASSIGNED', 'date__range': (start_date, end_date)}
+    if lock:
+        # FOR UPDATE cannot be combined with the GROUP BY below, so lock the rows first
+        list(Tour.objects.select_for_update().filter(**tour_filter).values_list('id', flat=True))
+    tour_rows = Tour.objects.filter(**tour_filter).annotate(
+        guide_count=Count('guides')
+    ).values_list('id', 'date', 'slot', 'guide_count')
+
+    tours = []
+    for tour_id, date, slot, guide_count in tour_rows:
+        tours.append((tour_id, date, SLOT_INDEX.get(slot, 0), max(guides_per_tour - guide_count, 0)))
+
+    guides = [
+        (guide_id, [position - 1 for position in free_slots], rating)
+        for guide_id, free_slots, rating in Guide.objects.values_list('id', 'free_slots', 'rating')
+    ]
+
+    busy, load = defaultdict(set), defaultdict(int)
+    existing = Tour.guides.through.objects.filter(
+        tour__date__range=(start_date, end_date)
+    ).values_list('guide_id', 'tour__date', 'tour__slot')
+    for guide_id, date, slot in existing:
+        busy[guide_id].add((date, SLOT_INDEX.get(slot, 0)))
+        load[guide_id] += 1
+
+    needed = {tour_id: count for tour_id, _, _, count in tours}
+    return needed, assign_guides(tours, guides, busy, load)
+
+
+def apply_guide_assignment(start_date, end_date, guides_per_tour=1):
+    """
+    Compute and store the assignment in one transaction; returns the same as plan_guide_assignment.
+    Only tours that got every guide they need become ASSIGNED; understaffed tours stay
+    UNASSIGNED so a later run can fill them.
+    """
+    with transaction.atomic():
+        needed, assignments = plan_guide_assignment(start_date, end_date, guides_per_tour, lock=True)
+        Through = Tour.guides.through
+        Through.objects.bulk_create(
+            [Through(tour_id=tour_id, guide_id=guide_id) for tour_id, guide_ids in assignments.items() for guide_id in guide_ids],
+            ignore_conflicts=True,
+        )
+        staffed = [tour_id for tour_id, guide_ids in assignments.items() if len(guide_ids) >= needed[tour_id]]
+        Tour.objects.filter(id__in=staffed).update(status='ASSIGNED')
+    return needed, assignments
+
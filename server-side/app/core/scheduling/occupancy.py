@@ -0,0 +1,105 @@
+"""
+Tour slot occupancy.
+
+For any set of (date, slot) pairs one query returns, per pair, the tours taking
+place, how many of them still have no guide, and the guides that are available
+at that weekday/slot and not already on a tour then. A slot is full when it
+already holds TOUR_SLOT_CAPACITY tours (0 means no fixed limit), or when it has
+tours and they leave no free guide for another one. A slot without tours is never
+full for lack of guides; `guide_shortage` only hints that nobody could staff it yet.
+
+Tour counts come from the (date, slot) index on Tour and guide availability from
+the GIN index on Guide.free_slots, so nothing is maintained besides the indexes.
+Writers that must not overbook take lock_slots() first: it serializes everyone
+scheduling into the same slots until their transaction ends.
+"""
+from django.conf import settings
+from django.db import connection
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.scheduling.guide_assignment import SLOT_INDEX, availability_index
+
+# First key of the advisory locks taken on (date, slot) pairs
+SLOT_LOCK_NAMESPACE = 7301
+
+
+def slot_key(date, slot):
+    """Second advisory lock key of a (date, slot) pair, unique per pair."""
+    return date.toordinal() * len(SLOT_INDEX) + SLOT_INDEX.get(slot, 0)
+
+
+def lock_slots(pairs):
+    """
+    Take transaction-level advisory locks on the given (date, slot) pairs, in a fixed
+    order so concurrent callers cannot deadlock. Must run inside transaction.atomic().
+    """
+    keys = sorted({slot_key(date, slot) for date, slot in pairs})
+    if not keys:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(%s, key) FROM unnest(%s::int[]) AS key ORDER BY key',
+            [SLOT_LOCK_NAMESPACE, keys],
+        )
+
+
+def slot_occupancy(pairs):
+    """
+    Occupancy of the given (date, slot) pairs in one query. Returns a dict keyed by
+    (date, slot) with `tours`, `unstaffed_tours`, `free_guides`, `spare_guides` (free
+    guides left once every unstaffed tour gets one), `guide_shortage` (no spare guide
+    for another tour), `free_capacity` (tours that can still be added) and `is_full`.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+
+    tour_table = Tour._meta.db_table
+    tour_guides_table = Tour.guides.through._meta.db_table
+    guide_table = Guide._meta.db_table
+    values = ', '.join('(%s::date, %s::varchar, %s::int)' for _ in pairs)
+    params = []
+    for date, slot in pairs:
+        # free_slots holds 1-based availability positions
+        params += [date, slot, availability_index(date, SLOT_INDEX.get(slot, 0)) + 1]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            WITH wanted (date, slot, position) AS (VALUES {values})
+            SELECT
+                wanted.date,
+                wanted.slot,
+                (SELECT COUNT(*) FROM {tour_table} t WHERE t.date = wanted.date AND t.slot = wanted.slot),
+                (SELECT COUNT(*) FROM {tour_table} t WHERE t.date = wanted.date AND t.slot = wanted.slot
+                    AND NOT EXISTS (SELECT 1 FROM {tour_guides_table} tg WHERE tg.tour_id = t.id)),
+                (SELECT COUNT(*) FROM {guide_table} g WHERE g.free_slots @> ARRAY[wanted.position]
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {tour_guides_table} tg JOIN {tour_table} t ON t.id = tg.tour_id
+                        WHERE tg.guide_id = g.id AND t.date = wanted.date AND t.slot = wanted.slot
+                    ))
+            FROM wanted
+            ''',
+            params,
+        )
+        rows = cursor.fetchall()
+
+    capacity = settings.TOUR_SLOT_CAPACITY
+    occupancy = {}
+    for date, slot, tours, unstaffed, free_guides in rows:
+        spare_guides = free_guides - unstaffed
+        # Guides only limit slots that already have tours; an empty one can take its first
+        guide_room = max(spare_guides, 0 if tours else 1)
+        free_capacity = min(guide_room, capacity - tours) if capacity else guide_room
+        occupancy[(date, slot)] = {
+            'date': date,
+            'slot': slot,
+            'tours': tours,
+            'unstaffed_tours': unstaffed,
+            'free_guides': free_guides,
+            'spare_guides': spare_guides,
+            'guide_shortage': spare_guides <= 0,
+            'free_capacity': max(free_capacity, 0),
+            'is_full': free_capacity <= 0,
+        }
+    return occupancy
@@ -1,7 +1,21 @@
+from datetime import date, timedelta
 from rest_framework import serializers
 from core.models._Advisor import Advisor
 
 class AdvisorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Advisor
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+class GuideReportInputSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, data):
+        # Defaults to the last 30 days
+        data.setdefault('end_date', date.today())
+        data.setdefault('start_date', data['end_date'] - timedelta(days=30))
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("start_date must not be after end_date.")
+        return data
\ No newline at end of file
@@ -0,0 +1,43 @@
+from rest_framework import serializers
+from core.constants import TIME_SLOTS
+
+# Most ids one bulk request may carry
+BULK_MAX_IDS = 1000
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=BULK_MAX_IDS)
+
+
+class BulkRejectSerializer(BulkIdsSerializer):
+    reason = serializers.CharField()
+
+
+class BulkScheduleItemSerializer(serializers.Serializer):
+    batch_id = serializers.IntegerField()
+    date = serializers.DateField()
+    slot = serializers.ChoiceField(choices=TIME_SLOTS)
+
+
+class BulkScheduleSerializer(serializers.Serializer):
+    items = BulkScheduleItemSerializer(many=True, allow_empty=False, max_length=BULK_MAX_IDS)
+
+    def validate_items(self, items):
+        batch_ids = [item['batch_id'] for item in items]
+        if len(set(batch_ids)) != len(batch_ids):
+            raise serializers.ValidationError("Each batch can only be listed once.")
+        return items
+
+
+class BulkResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    success = serializers.BooleanField()
+    error = serializers.CharField(required=False)
+
+
+def bulk_results(errors):
+    """Per-id results in request order from a dict mapping ids to None or an error message."""
+    return [
+        {"id": pk, "success": True} if error is None else {"id": pk, "success": False, "error": error}
+        for pk, error in errors.items()
+    ]
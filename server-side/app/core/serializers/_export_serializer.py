@@ -0,0 +1,12 @@
+from rest_framework import serializers
+
+
+class ExportRangeSerializer(serializers.Serializer):
+    """Optional date bounds for export endpoints; an omitted bound exports everything on that side."""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if 'start_date' in data and 'end_date' in data and data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("start_date must not be after end_date.")
+        return data
@@ -11,4 +11,20 @@ class TourRequestBatchSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TourRequestBatch
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+
+class CreatedTourRequestBatchSerializer(TourRequestBatchSerializer):
+    """A batch just built by create-with-requests, nesting the tour requests it was created with instead of querying them."""
+    tour_requests = TourRequestSerializer(source='created_tour_requests', many=True, read_only=True)
+
+
+class AutoScheduleInputSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    dry_run = serializers.BooleanField(default=True)
+
+    def validate(self, data):
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("start_date must not be after end_date.")
+        return data
@@ -9,12 +9,20 @@ class TourRequestSerializer(serializers.ModelSerializer):
 class TourRequestInputSerializer(serializers.Serializer):
     dates = serializers.ListField(
         child=serializers.DateField(),
-        required=True
+        required=True,
+        allow_empty=False
     )
     time_slots = serializers.ListField(
         child=serializers.ChoiceField(choices=TourRequest._meta.get_field('time_slot').choices),
-        required=True
+        required=True,
+        allow_empty=False
     )
     visitor_id = serializers.IntegerField(required=True)
     additional_notes = serializers.CharField(required=False, allow_blank=True)
-    number_of_visitors = serializers.IntegerField(required=True)
\ No newline at end of file
+    number_of_visitors = serializers.IntegerField(required=True)
+
+    def validate(self, data):
+        """Each preference is a date with its time slot, so both lists must pair up."""
+        if len(data['dates']) != len(data['time_slots']):
+            raise serializers.ValidationError("dates and time_slots must have the same length.")
+        return data
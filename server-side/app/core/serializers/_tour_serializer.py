@@ -49,6 +49,17 @@ class TourSerializer(serializers.ModelSerializer):
 
         return super().update(instance, validated_data)
 
+class AutoAssignInputSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    guides_per_tour = serializers.IntegerField(min_value=1, default=1)
+    dry_run = serializers.BooleanField(default=True)
+
+    def validate(self, data):
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("start_date must not be after end_date.")
+        return data
+
 class CompletedToursInputSerializer (serializers.Serializer):
     advisor_id = serializers.IntegerField()
 
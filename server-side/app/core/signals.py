@@ -0,0 +1,35 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.models._TourRequest import TourRequest
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.availability import invalidate_availability_matrix
+from core.dashboard import invalidate_dashboard_stats
+from core.messaging.user_cache import resolved_users
+
+
+@receiver([post_save, post_delete], sender=Guide)
+def guide_changed(sender, **kwargs):
+    invalidate_availability_matrix()
+    transaction.on_commit(invalidate_dashboard_stats)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Sockets must not keep a stale or deactivated user, in any worker
+    transaction.on_commit(partial(resolved_users.invalidate_user, instance.pk))
+    # The availability matrix and the dashboard ratings carry guide names
+    if instance.role == 'guide':
+        invalidate_availability_matrix()
+        transaction.on_commit(invalidate_dashboard_stats)
+
+
+@receiver([post_save, post_delete], sender=Tour)
+@receiver([post_save, post_delete], sender=TourRequest)
+@receiver([post_save, post_delete], sender=Visitor)
+def dashboard_source_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_dashboard_stats)
@@ -0,0 +1,50 @@
+import tempfile
+from datetime import date
+from celery import shared_task
+from django.core.mail import EmailMessage
+from django.utils.crypto import get_random_string
+from core.models._User import User
+from core.utils import send_email, send_rejection_email
+from core.exports import XLSX_CONTENT_TYPE
+from core.reports import GUIDE_HOURS_HEADER, GUIDE_HOURS_TITLE, guide_hours_rows, write_workbook
+
+
+@shared_task
+def send_guide_report(email, start_date, end_date):
+    """Build the guide working-hours workbook for the date range (ISO dates) and email it."""
+    rows = guide_hours_rows(date.fromisoformat(start_date), date.fromisoformat(end_date))
+    with tempfile.TemporaryFile() as workbook_file:
+        row_count = write_workbook(GUIDE_HOURS_TITLE, GUIDE_HOURS_HEADER, rows, workbook_file)
+        workbook_file.seek(0)
+        content = workbook_file.read()
+
+    email_message = EmailMessage(
+        subject="Guide Working Hours Report",
+        body="Please find the attached report for guide working hours.",
+        to=[email]
+    )
+    email_message.attach("guide_working_hours.xlsx", content, XLSX_CONTENT_TYPE)
+    email_message.send()
+    return {"email": email, "start_date": start_date, "end_date": end_date, "rows": row_count}
+
+
+@shared_task
+def send_account_credentials(user_id):
+    """
+    Give a user approved without a password a random one and email it to them. Hashing
+    happens here rather than in the approving request; users that already have a
+    usable password are left alone, so a repeated task cannot reset it.
+    """
+    user = User.objects.filter(id=user_id).first()
+    if user is None or user.has_usable_password():
+        return False
+    password = get_random_string(length=8)
+    user.set_password(password)
+    user.save(update_fields=['password'])
+    send_email(to_email=user.email, receiver=user.name, password=password)
+    return True
+
+
+@shared_task
+def send_registration_rejection(email, name, reason):
+    send_rejection_email(to_email=email, receiver=name, rejection_reason=reason)
@@ -0,0 +1,77 @@
+from datetime import date
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.models._TourRequest import TourRequest
+from core.models._TourRequestBatch import TourRequestBatch
+from core.models._User import User
+from core.models._Visitor import Visitor
+
+MONDAY = date(2030, 1, 7)
+
+
+@override_settings(TOUR_SLOT_CAPACITY=1)
+class AutoScheduleTests(TestCase):
+    """auto-schedule with every Monday slot limited to one tour."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor')
+        cls.visitor = Visitor.objects.create(user=user, type='individual')
+        cls.advisor_user = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor', is_staff=True)
+        guide_user = User.objects.create(email='guide@example.com', name='Guide', role='guide')
+        Guide.objects.create(user=guide_user, availability=[1] * 4 + [0] * 24)
+
+        # Three approved batches want 09.00; the second can fall back to 11.00
+        cls.first = cls.batch('approved', '09.00 AM')
+        cls.second = cls.batch('approved', '09.00 AM', '11.00 AM')
+        cls.third = cls.batch('approved', '09.00 AM')
+        cls.pending = cls.batch('pending', '13.30 PM')
+
+    @classmethod
+    def batch(cls, status, *slots):
+        batch = TourRequestBatch.objects.create(visitor=cls.visitor, status=status)
+        TourRequest.objects.bulk_create([TourRequest(batch=batch, date=MONDAY, time_slot=slot) for slot in slots])
+        return batch
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.advisor_user)
+
+    def auto_schedule(self, dry_run):
+        response = self.client.post('/api/tour_request_batch/auto-schedule/', {
+            'start_date': str(MONDAY), 'end_date': str(MONDAY), 'dry_run': dry_run,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_dry_run_writes_nothing(self):
+        data = self.auto_schedule(dry_run=True)
+        self.assertFalse(data['applied'])
+        self.assertEqual(len(data['scheduled']), 2)
+        self.assertEqual(Tour.objects.count(), 0)
+        self.assertEqual(
+            set(TourRequestBatch.objects.values_list('status', flat=True)), {'approved', 'pending'},
+        )
+
+    def test_commit_creates_tours_within_capacity(self):
+        data = self.auto_schedule(dry_run=False)
+        self.assertTrue(data['applied'])
+        scheduled = {item['batch_id']: item for item in data['scheduled']}
+        # One tour per slot: the second batch takes its fallback, one of the others waits
+        self.assertEqual(scheduled[self.second.id]['slot'], '11.00 AM')
+        self.assertEqual(len(scheduled), 2)
+        self.assertEqual(len(data['unscheduled_batch_ids']), 1)
+        self.assertEqual(sorted(Tour.objects.values_list('slot', flat=True)), ['09.00 AM', '11.00 AM'])
+
+        for batch_id, item in scheduled.items():
+            batch = TourRequestBatch.objects.get(id=batch_id)
+            self.assertEqual((batch.status, batch.tour_id), ('scheduled', item['tour_id']))
+
+    def test_pending_batches_wait_for_approval(self):
+        data = self.auto_schedule(dry_run=False)
+        self.assertNotIn(self.pending.id, [item['batch_id'] for item in data['scheduled']])
+        self.assertNotIn(self.pending.id, data['unscheduled_batch_ids'])
+        self.pending.refresh_from_db()
+        self.assertEqual((self.pending.status, self.pending.tour_id), ('pending', None))
@@ -0,0 +1,68 @@
+from datetime import date
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.models._TourRequestBatch import TourRequestBatch
+from core.models._User import User
+from core.models._Visitor import Visitor
+
+MONDAY = date(2030, 1, 7)
+
+
+@override_settings(TOUR_SLOT_CAPACITY=1)
+class BulkScheduleTests(TestCase):
+    """bulk-schedule with every Monday slot limited to one tour."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor')
+        cls.visitor = Visitor.objects.create(user=user, type='individual')
+        cls.advisor_user = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor', is_staff=True)
+        for number in range(3):
+            guide_user = User.objects.create(email=f'guide{number}@example.com', name=f'Guide {number}', role='guide')
+            Guide.objects.create(user=guide_user, availability=[1] * 4 + [0] * 24)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.advisor_user)
+
+    def batch(self, status, slot=None):
+        tour = Tour.objects.create(date=MONDAY, slot=slot, visitor=self.visitor) if slot else None
+        return TourRequestBatch.objects.create(visitor=self.visitor, status=status, tour=tour)
+
+    def bulk_schedule(self, *items):
+        response = self.client.post('/api/tour_request_batch/bulk-schedule/', {'items': [
+            {'batch_id': batch.id, 'date': str(MONDAY), 'slot': slot} for batch, slot in items
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [result.get('error') for result in response.data['results']]
+
+    def slot_of(self, batch):
+        batch.refresh_from_db()
+        return batch.tour.slot if batch.tour else None
+
+    def test_only_approved_and_scheduled_batches(self):
+        pending, rejected, approved = self.batch('pending'), self.batch('rejected'), self.batch('approved')
+        errors = self.bulk_schedule((pending, '09.00 AM'), (rejected, '11.00 AM'), (approved, '13.30 PM'))
+        self.assertEqual(errors, [
+            "Cannot schedule a batch that is pending.", "Cannot schedule a batch that is rejected.", None,
+        ])
+        self.assertEqual(self.slot_of(approved), '13.30 PM')
+
+    def test_full_slot(self):
+        self.batch('scheduled', '09.00 AM')
+        approved = self.batch('approved')
+        self.assertEqual(self.bulk_schedule((approved, '09.00 AM')), ["This time slot is fully booked."])
+
+    def test_slot_freed_by_a_later_move(self):
+        moving = self.batch('scheduled', '09.00 AM')
+        approved = self.batch('approved')
+        self.assertEqual(self.bulk_schedule((approved, '09.00 AM'), (moving, '11.00 AM')), [None, None])
+        self.assertEqual((self.slot_of(approved), self.slot_of(moving)), ('09.00 AM', '11.00 AM'))
+
+    def test_swap_between_full_slots(self):
+        first, second = self.batch('scheduled', '09.00 AM'), self.batch('scheduled', '11.00 AM')
+        self.assertEqual(self.bulk_schedule((first, '11.00 AM'), (second, '09.00 AM')), [None, None])
+        self.assertEqual((self.slot_of(first), self.slot_of(second)), ('11.00 AM', '09.00 AM'))
+        self.assertEqual(Tour.objects.count(), 2)
@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from core.auth.authentication import ClaimsUser
+from core.auth.serializers import AuthSerializer
+from core.models._User import User
+
+
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='guide@example.com', name='Guide', role='guide')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AuthSerializer.get_token(self.user).access_token}')
+
+    def test_opted_in_read_view_does_not_load_the_user(self):
+        # Only the sent stream itself
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/messages/sent/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_views_load_the_user_row(self):
+        # The profile picture is not a claim, so a ClaimsUser here would fail
+        response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'guide@example.com')
+
+
+class ClaimsUserTests(SimpleTestCase):
+    def claims_user(self, **claims):
+        token = AccessToken()
+        token['user_id'] = '7'
+        for claim, value in {'role': 'advisor', 'name': 'Advisor', 'email': 'a@example.com', 'profile_id': 3, **claims}.items():
+            token[claim] = value
+        return ClaimsUser(token)
+
+    def test_carries_the_user_claims(self):
+        user = self.claims_user()
+        self.assertEqual((user.id, user.role, user.name, user.profile_id), (7, 'advisor', 'Advisor', 3))
+
+    def test_fails_closed_for_everything_else(self):
+        user = self.claims_user(is_staff=True, is_superuser=True)
+        self.assertFalse(user.is_staff or user.is_superuser)
+        self.assertFalse(user.groups.exists())
+        self.assertFalse(user.has_perm('core.delete_user'))
+        with self.assertRaises(AttributeError):
+            user.profile_picture
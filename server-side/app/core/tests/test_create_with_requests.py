@@ -0,0 +1,59 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models._TourRequestBatch import TourRequestBatch
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.serializers._tour_request_batch_serializer import TourRequestBatchSerializer
+
+URL = '/api/tour_request_batch/create-with-requests/'
+
+
+class CreateWithRequestsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.advisor_user = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor', is_staff=True)
+        cls.visitors = [
+            Visitor.objects.create(
+                user=User.objects.create(email=f'visitor{i}@example.com', name=f'Visitor {i}', role='visitor'),
+                type='high-school',
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.advisor_user)
+
+    def batch_data(self, visitor, **changes):
+        return {
+            'visitor_id': visitor.id,
+            'dates': ['2030-01-07', '2030-01-08'],
+            'time_slots': ['09.00 AM', '11.00 AM'],
+            'number_of_visitors': 20,
+            **changes,
+        }
+
+    def test_response_matches_stored_batch(self):
+        response = self.client.post(URL, self.batch_data(self.visitors[0]), format='json')
+        self.assertEqual(response.status_code, 201)
+        data = dict(response.data)
+        self.assertEqual(len(data.pop('availability')), 2)
+        self.assertEqual(data, TourRequestBatchSerializer(TourRequestBatch.objects.get(id=data['id'])).data)
+
+    def test_list_of_batches_in_fixed_queries(self):
+        counts = []
+        for count in (1, 6):
+            body = [self.batch_data(self.visitors[i % 3]) for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(URL, body, format='json')
+            self.assertEqual((response.status_code, len(response.data)), (201, count))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_mismatched_preferences_write_nothing(self):
+        body = [self.batch_data(self.visitors[0]), self.batch_data(self.visitors[1], time_slots=['09.00 AM'])]
+        response = self.client.post(URL, body, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TourRequestBatch.objects.exists())
@@ -0,0 +1,18 @@
+from django.core.cache import cache
+from django.test import TestCase
+from core.dashboard import DASHBOARD_CACHE_KEY, get_dashboard_stats
+from core.models._User import User
+from core.models._Visitor import Visitor
+
+
+class DashboardInvalidationTests(TestCase):
+    def test_cached_stats_are_cleared_only_once_the_write_commits(self):
+        get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor')
+            Visitor.objects.create(user=user, type='individual')
+            # Clearing before commit would let a concurrent reader re-cache the old counts
+            self.assertIsNotNone(cache.get(DASHBOARD_CACHE_KEY))
+        self.assertTrue(callbacks)
+        self.assertIsNone(cache.get(DASHBOARD_CACHE_KEY))
+        self.assertEqual(get_dashboard_stats()['total_visitors_count'], 1)
@@ -0,0 +1,57 @@
+from datetime import date
+from django.test import SimpleTestCase, TestCase
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.scheduling.guide_assignment import apply_guide_assignment, assign_guides
+
+MONDAY = date(2030, 1, 7)
+
+
+class ApplyGuideAssignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor')
+        cls.visitor = Visitor.objects.create(user=user, type='individual')
+
+    def add_guide(self, number):
+        """A guide available on Monday mornings only."""
+        user = User.objects.create(email=f'guide{number}@example.com', name=f'Guide {number}', role='guide')
+        return Guide.objects.create(user=user, availability=[1] + [0] * 27)
+
+    def test_understaffed_tour_stays_unassigned_until_filled(self):
+        tour = Tour.objects.create(date=MONDAY, slot='09.00 AM', visitor=self.visitor)
+        first = self.add_guide(1)
+
+        needed, assignments = apply_guide_assignment(MONDAY, MONDAY, guides_per_tour=2)
+        tour.refresh_from_db()
+        self.assertEqual((needed[tour.id], assignments[tour.id]), (2, [first.id]))
+        self.assertEqual(tour.status, 'UNASSIGNED')
+
+        second = self.add_guide(2)
+        needed, assignments = apply_guide_assignment(MONDAY, MONDAY, guides_per_tour=2)
+        tour.refresh_from_db()
+        self.assertEqual((needed[tour.id], assignments[tour.id]), (1, [second.id]))
+        self.assertEqual(tour.status, 'ASSIGNED')
+        self.assertCountEqual(tour.guides.values_list('id', flat=True), [first.id, second.id])
+
+
+class AssignGuidesTests(SimpleTestCase):
+    def test_rating_breaks_ties_between_equally_balanced_assignments(self):
+        # Two tours at Monday 13.30 and one at 09.00; every full staffing gives each guide one tour
+        tours = [(1, MONDAY, 2, 1), (2, MONDAY, 2, 1), (3, MONDAY, 0, 1)]
+        guides = [
+            (10, [0, 2], 5.0),
+            (20, [0], 3.0),
+            (30, [2], 2.0),
+            (40, [0, 2], 1.0),
+        ]
+        assignments = assign_guides(tours, guides)
+        self.assertCountEqual(assignments[1] + assignments[2], [10, 30])
+        self.assertEqual(assignments[3], [20])
+
+    def test_balance_outweighs_rating(self):
+        tours = [(1, MONDAY, 0, 1)]
+        guides = [(10, [0], 5.0), (20, [0], 0.0)]
+        self.assertEqual(assign_guides(tours, guides, load={10: 1}), {1: [20]})
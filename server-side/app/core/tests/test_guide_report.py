@@ -0,0 +1,61 @@
+from datetime import date
+from unittest import mock
+from django.core import mail
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.models._TourReport import TourReport
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.tasks import send_guide_report
+
+MONDAY = date(2030, 1, 7)
+
+
+def run_eagerly(*args):
+    return send_guide_report.apply(args=args)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+@mock.patch('core.views._advisor_view.send_guide_report_task.delay', side_effect=run_eagerly)
+class GuideReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        visitor_user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor')
+        visitor = Visitor.objects.create(user=visitor_user, type='individual', highSchoolName='High School')
+        guide_user = User.objects.create(email='guide@example.com', name='Guide', role='guide')
+        guide = Guide.objects.create(user=guide_user)
+        tour = Tour.objects.create(date=MONDAY, slot='09.00 AM', visitor=visitor, status='COMPLETED')
+        tour.guides.add(guide)
+        TourReport.objects.create(tour=tour, guide=guide, report='Done', finishedAtHour=10, finishedAtMinute=30)
+        cls.advisor_user = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor', is_staff=True)
+        cls.other_user = User.objects.create(email='other@example.com', name='Other', role='advisor', is_staff=True)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_report_is_emailed_and_status_visible_to_its_owner_only(self, delay):
+        response = self.client_for(self.advisor_user).post('/api/advisor/send-guide-report/', {
+            'email': 'reports@example.com', 'start_date': '2030-01-01', 'end_date': '2030-01-31',
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job_id']
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reports@example.com'])
+        self.assertEqual(mail.outbox[0].attachments[0][0], 'guide_working_hours.xlsx')
+
+        status_url = f'/api/advisor/guide-report-status/{job_id}/'
+        response = self.client_for(self.advisor_user).get(status_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'SUCCESS')
+        self.assertEqual(response.data['result']['rows'], 1)
+
+        self.assertEqual(self.client_for(self.other_user).get(status_url).status_code, 404)
+
+    def test_unknown_job_id_is_not_found(self, delay):
+        response = self.client_for(self.advisor_user).get('/api/advisor/guide-report-status/not-a-job/')
+        self.assertEqual(response.status_code, 404)
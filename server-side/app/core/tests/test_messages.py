@@ -0,0 +1,67 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.messaging._Message import Chat, Message
+from core.models._User import User
+
+
+class RetrieveMessagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.advisor = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor')
+        cls.receivers = [
+            User.objects.create(email=f'guide{number}@example.com', name=f'Guide {number}', role='guide')
+            for number in range(12)
+        ]
+        message = Message.objects.create(sender=cls.advisor, message_type='broadcast', content='Hello')
+        message.receivers.set(cls.receivers)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.advisor)
+
+    def test_legacy_endpoint_lists_every_receiver_by_default(self):
+        response = self.client.get('/api/messages/')
+        self.assertEqual(response.status_code, 200)
+        sent = response.data['sent_messages'][0]
+        self.assertEqual([receiver['id'] for receiver in sent['receivers']], [user.id for user in self.receivers])
+        self.assertEqual(sent['receivers_count'], 12)
+
+    def test_legacy_endpoint_drops_receivers_on_request(self):
+        response = self.client.get('/api/messages/', {'include_receivers': 'false'})
+        sent = response.data['sent_messages'][0]
+        self.assertNotIn('receivers', sent)
+        self.assertEqual(sent['receivers_count'], 12)
+
+    def test_sent_stream_stays_slim_by_default(self):
+        response = self.client.get('/api/messages/sent/')
+        self.assertNotIn('receivers', response.data['results'][0])
+
+    def test_legacy_endpoint_query_count_does_not_grow_with_messages(self):
+        for _ in range(5):
+            message = Message.objects.create(sender=self.advisor, message_type='broadcast', content='Again')
+            message.receivers.set(self.receivers)
+        # Unseen count, both streams and one receivers prefetch for the sent one (nothing was received)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/messages/')
+        self.assertEqual(len(response.data['sent_messages']), 6)
+
+
+class MarkMessagesAsReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.advisor = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor')
+        cls.guide = User.objects.create(email='guide@example.com', name='Guide', role='guide')
+        cls.chat = Chat.objects.create(participant1=cls.advisor, participant2=cls.guide)
+        direct = Message.objects.create(sender=cls.advisor, chat=cls.chat, message_type='direct', content='Hi')
+        direct.receivers.set([cls.guide])
+        broadcast = Message.objects.create(sender=cls.advisor, message_type='broadcast', content='Hello all')
+        broadcast.receivers.set([cls.guide])
+
+    def test_broadcast_mark_read_leaves_direct_chats_unread(self):
+        client = APIClient()
+        client.force_authenticate(self.guide)
+        response = client.post('/api/chats/broadcast/mark-read/')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(Message.objects.received_by(self.guide).filter(chat__isnull=True).unseen_by(self.guide).count(), 0)
+        self.assertEqual(Chat.objects.with_previews(self.guide).get(id=self.chat.id).unread_count, 1)
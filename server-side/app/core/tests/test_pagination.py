@@ -0,0 +1,52 @@
+from datetime import date
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models._Tour import Tour
+from core.models._User import User
+from core.models._Visitor import Visitor
+
+
+class KeysetCursorPaginationTests(TestCase):
+    """Tours paginated by (date, id) with many tours sharing a date."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor', is_staff=True)
+        visitor = Visitor.objects.create(user=cls.user, type='individual')
+        tours = Tour.objects.bulk_create([
+            Tour(date=date(2030, 1, 7 + i // 8), slot='09.00 AM', visitor=visitor) for i in range(20)
+        ])
+        cls.tour_ids = [tour.id for tour in sorted(tours, key=lambda tour: (tour.date, tour.id))]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_page(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries:
+            self.assertNotIn('OFFSET', query['sql'])
+        return response.data
+
+    def test_pages_cover_every_tour_once_both_ways(self):
+        page = self.get_page('/api/tour/?paginate=true&page_size=3')
+        seen = [tour['id'] for tour in page['results']]
+        while page['next']:
+            page = self.get_page(page['next'])
+            seen += [tour['id'] for tour in page['results']]
+        self.assertEqual(seen, self.tour_ids)
+
+        back = []
+        while page['previous']:
+            page = self.get_page(page['previous'])
+            back = [tour['id'] for tour in page['results']] + back
+        self.assertEqual(back, self.tour_ids[:-2])
+
+    def test_cursor_without_every_ordering_value(self):
+        # The position ["x"] only has one of the two (date, id) values
+        response = self.client.get('/api/tour/?cursor=cD0lNUIlMjJ4JTIyJTVE')
+        self.assertEqual(response.status_code, 404)
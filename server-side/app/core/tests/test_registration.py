@@ -0,0 +1,76 @@
+from unittest import mock
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.models._RegRequest import RegRequest
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.registration import EMAIL_TAKEN, NOT_FOUND
+
+MISSING_ID = 999999
+
+
+class RegistrationBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.advisor_user = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor', is_staff=True)
+        User.objects.create(email='taken@example.com', name='Taken', role='visitor')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.advisor_user)
+
+    def reg_request(self, email):
+        return RegRequest.objects.create(name=email.split('@')[0], email=email, phone_no='555', user_type='individual')
+
+    def post(self, action, ids, **extra):
+        response = self.client.post(f'/api/reg_request/{action}/', {'ids': ids, **extra}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [result.get('error') for result in response.data['results']]
+
+    @mock.patch('core.registration.send_account_credentials.delay')
+    def test_bulk_approve(self, send_credentials):
+        new = self.reg_request('new@example.com')
+        taken = self.reg_request('taken@example.com')
+        # Same address once the domain is normalized, so only the first one gets it
+        first, duplicate = self.reg_request('twin@example.com'), self.reg_request('twin@EXAMPLE.com')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            errors = self.post('bulk-approve', [new.id, taken.id, first.id, duplicate.id, MISSING_ID])
+            self.assertFalse(send_credentials.called)
+
+        self.assertEqual(errors, [None, EMAIL_TAKEN, None, EMAIL_TAKEN, NOT_FOUND])
+        created = User.objects.filter(email__in=['new@example.com', 'twin@example.com'])
+        self.assertEqual(Visitor.objects.filter(user__in=created).count(), 2)
+        self.assertCountEqual([call.args[0] for call in send_credentials.call_args_list], created.values_list('id', flat=True))
+        self.assertCountEqual(RegRequest.objects.values_list('id', flat=True), [taken.id, duplicate.id])
+
+    @mock.patch('core.registration.send_account_credentials.delay')
+    def test_email_taken_by_a_concurrent_approval(self, send_credentials):
+        racing, other = self.reg_request('racing@example.com'), self.reg_request('other@example.com')
+        User.objects.create(email='racing@example.com', name='Racing', role='visitor')
+        real_filter = User.objects.filter
+        checks = []
+
+        def miss_first_check(*args, **kwargs):
+            # As if another approval committed the email right after the taken check
+            checks.append(kwargs)
+            return User.objects.none() if len(checks) == 1 else real_filter(*args, **kwargs)
+
+        with mock.patch.object(User.objects, 'filter', side_effect=miss_first_check):
+            with self.captureOnCommitCallbacks(execute=True):
+                errors = self.post('bulk-approve', [racing.id, other.id])
+
+        self.assertEqual(errors, [EMAIL_TAKEN, None])
+        self.assertEqual(send_credentials.call_count, 1)
+        self.assertTrue(Visitor.objects.filter(user__email='other@example.com').exists())
+
+    @mock.patch('core.registration.send_registration_rejection.delay')
+    def test_bulk_reject(self, send_rejection):
+        reg_request = self.reg_request('rejected@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            errors = self.post('bulk-reject', [reg_request.id, MISSING_ID], reason='Incomplete form')
+            self.assertFalse(send_rejection.called)
+
+        self.assertEqual(errors, [None, NOT_FOUND])
+        send_rejection.assert_called_once_with('rejected@example.com', 'rejected', 'Incomplete form')
+        self.assertFalse(RegRequest.objects.filter(id=reg_request.id).exists())
@@ -0,0 +1,66 @@
+from datetime import date
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.models._Guide import Guide
+from core.models._Tour import Tour
+from core.models._TourRequestBatch import TourRequestBatch
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.scheduling.occupancy import slot_occupancy
+
+MONDAY = date(2030, 1, 7)
+SLOT = (MONDAY, '09.00 AM')
+
+
+class SlotOccupancyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor')
+        cls.visitor = Visitor.objects.create(user=user, type='individual')
+        cls.advisor_user = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor', is_staff=True)
+
+    def add_guide(self):
+        """A guide available on Monday mornings only."""
+        number = Guide.objects.count()
+        user = User.objects.create(email=f'guide{number}@example.com', name=f'Guide {number}', role='guide')
+        return Guide.objects.create(user=user, availability=[1] + [0] * 27)
+
+    def add_tour(self):
+        return Tour.objects.create(date=MONDAY, slot='09.00 AM', visitor=self.visitor)
+
+    def test_empty_slot_without_guides_is_not_full(self):
+        occupancy = slot_occupancy([SLOT])[SLOT]
+        self.assertTrue(occupancy['guide_shortage'])
+        self.assertFalse(occupancy['is_full'])
+        self.assertEqual(occupancy['free_capacity'], 1)
+
+    def test_tours_without_spare_guides_fill_the_slot(self):
+        self.add_guide()
+        self.add_tour()
+        occupancy = slot_occupancy([SLOT])[SLOT]
+        self.assertEqual((occupancy['tours'], occupancy['spare_guides']), (1, 0))
+        self.assertTrue(occupancy['is_full'])
+
+    def test_spare_guides_limit_free_capacity(self):
+        for _ in range(3):
+            self.add_guide()
+        self.add_tour()
+        occupancy = slot_occupancy([SLOT])[SLOT]
+        self.assertEqual((occupancy['free_capacity'], occupancy['is_full']), (2, False))
+
+    @override_settings(TOUR_SLOT_CAPACITY=1)
+    def test_explicit_capacity_fills_the_slot(self):
+        for _ in range(3):
+            self.add_guide()
+        self.add_tour()
+        self.assertTrue(slot_occupancy([SLOT])[SLOT]['is_full'])
+
+    def test_unstaffed_slot_takes_its_first_tour_only(self):
+        client = APIClient()
+        client.force_authenticate(self.advisor_user)
+        body = {'date': str(MONDAY), 'slot': '09.00 AM', 'visitor_id': self.visitor.id}
+        statuses = [
+            client.post(f'/api/tour_request_batch/{batch.id}/schedule/', body, format='json').status_code
+            for batch in [TourRequestBatch.objects.create(visitor=self.visitor) for _ in range(2)]
+        ]
+        self.assertEqual(statuses, [200, 409])
@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models._Advisor import Advisor
+from core.models._Guide import Guide
+from core.models._Review import Review
+from core.models._Tour import Tour
+from core.models._User import User
+from core.models._Visitor import Visitor
+
+START_DATE = date(2030, 1, 7)  # a Monday
+
+
+class TourQueryBudgetTests(TestCase):
+    """Each tour listing runs a fixed number of queries, however many tours it returns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.advisor_user = User.objects.create(email='advisor@example.com', name='Advisor', role='advisor', is_staff=True)
+        cls.advisor = Advisor.objects.create(user=cls.advisor_user, authorizedDay=[0, 1, 2, 3, 4, 5, 6])
+        cls.guides = [
+            Guide.objects.create(user=User.objects.create(email=f'guide{i}@example.com', name=f'Guide {i}', role='guide'))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.advisor_user)
+
+    def seed_tours(self, count):
+        """Create a visitor with `count` completed tours, each with its own review and all guides."""
+        number = Visitor.objects.count()
+        user = User.objects.create(email=f'visitor{number}@example.com', name=f'Visitor {number}', role='visitor')
+        visitor = Visitor.objects.create(user=user, type='individual')
+        for i in range(count):
+            tour = Tour.objects.create(
+                date=START_DATE + timedelta(days=i % 7),
+                slot='09.00 AM',
+                visitor=visitor,
+                review=Review.objects.create(review='Good', reviewRating=4.0),
+                status='COMPLETED',
+            )
+            tour.guides.set(self.guides)
+        return visitor
+
+    def query_count(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertFixedQueries(self, expected, url_for, **params):
+        """Run the endpoint with 2 and then 10 tours in the table and expect `expected` queries both times."""
+        counts = []
+        for count in (2, 8):
+            visitor = self.seed_tours(count)
+            counts.append(self.query_count(url_for(visitor), **params))
+        self.assertEqual(counts, [expected, expected])
+
+    def test_list(self):
+        self.assertFixedQueries(2, lambda visitor: '/api/tour/')
+
+    def test_guide_tours(self):
+        self.assertFixedQueries(3, lambda visitor: f'/api/tour/guide-tours/{self.guides[0].id}/')
+
+    def test_visitor_tours(self):
+        self.assertFixedQueries(3, lambda visitor: f'/api/tour/visitor-tours/{visitor.id}/')
+
+    def test_tours_by_date(self):
+        self.assertFixedQueries(2, lambda visitor: '/api/tour/tours-by-date/', date=str(START_DATE))
+
+    def test_advisor_tours(self):
+        self.assertFixedQueries(6, lambda visitor: f'/api/tour/advisor-tours/{self.advisor.id}/')
@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from core.models._Tour import Tour
+from core.models._User import User
+from core.models._Visitor import Visitor
+from core.views._tour_view import ISO_WEEK_DAYS, TourViewSet
+
+WEEKDAY_INDEX = 'core_tour_weekday_status_idx'
+START_DATE = date(2020, 1, 6)  # a Monday
+
+
+@skipUnless(connection.vendor == 'postgresql', "Checks PostgreSQL query plans")
+class TourWeekdayIndexTests(TestCase):
+    """The advisor tour filters are answered from the (weekday, status) index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(email='visitor@example.com', name='Visitor', role='visitor')
+        visitor = Visitor.objects.create(user=user, type='individual')
+        # 20k completed tours from Monday to Saturday and 100 Sunday tours, half of them completed
+        tours = [
+            Tour(date=START_DATE + timedelta(days=i % 6), slot='09.00 AM', visitor=visitor, status='COMPLETED')
+            for i in range(20000)
+        ] + [
+            Tour(date=START_DATE + timedelta(weeks=i, days=6), slot='09.00 AM', visitor=visitor,
+                 status='COMPLETED' if i % 2 else 'ASSIGNED')
+            for i in range(100)
+        ]
+        Tour.objects.bulk_create(tours, batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Tour._meta.db_table}')
+        # The weekday an advisor authorized on Sundays only filters on
+        cls.sunday = ISO_WEEK_DAYS[6]
+
+    def assertUsesWeekdayIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIn(WEEKDAY_INDEX, plan, plan)
+
+    def test_advisor_tours_use_index(self):
+        tours = TourViewSet().get_completed_queryset().filter(weekday__in=[self.sunday])
+        self.assertEqual(tours.count(), 100)
+        self.assertUsesWeekdayIndex(tours)
+
+    def test_completed_advisor_tours_use_index(self):
+        tours = TourViewSet().get_completed_queryset().filter(status='COMPLETED', weekday__in=[self.sunday])
+        self.assertEqual(tours.count(), 50)
+        self.assertUsesWeekdayIndex(tours)
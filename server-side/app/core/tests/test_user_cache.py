@@ -0,0 +1,30 @@
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from core.messaging.user_cache import ResolvedUserCache
+from core.models._User import User
+
+
+class ResolvedUserCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='guide@example.com', name='Guide', role='guide')
+
+    def cached_in(self, worker):
+        """Load the user into a worker's cache the way the socket middleware does."""
+        version = async_to_sync(worker.version)(self.user.id)
+        worker.set(self.user.id, 'jti', version, self.user)
+
+    def lookup(self, worker):
+        return worker.get(self.user.id, 'jti', async_to_sync(worker.version)(self.user.id))
+
+    def test_saving_a_user_drops_it_in_every_worker_once_committed(self):
+        workers = [ResolvedUserCache(100, 60), ResolvedUserCache(100, 60)]
+        for worker in workers:
+            self.cached_in(worker)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            self.assertEqual(self.lookup(workers[1]), self.user)
+
+        self.assertEqual([self.lookup(worker) for worker in workers], [None, None])
@@ -3,104 +3,92 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from core.models._Advisor import Advisor
-from core.models._Guide import Guide
-from core.models._Tour import Tour
-from core.models._TourReport import TourReport
-from core.models._TourRequest import TourRequest
-from core.models._Visitor import Visitor
-from core.serializers._advisor_serializer import AdvisorSerializer
-from django.core.mail import EmailMessage
-from openpyxl import Workbook
-from datetime import datetime, timedelta
-import io
+from core.serializers._advisor_serializer import AdvisorSerializer, GuideReportInputSerializer
+from core.dashboard import get_dashboard_stats
+from core.tasks import send_guide_report as send_guide_report_task
+from core.serializers._export_serializer import ExportRangeSerializer
+from core.reports import GUIDE_HOURS_HEADER, GUIDE_HOURS_TITLE, guide_hours_rows
+from core.exports import export_response
+from celery.result import AsyncResult
+from django.core.cache import cache
+from drf_spectacular.utils import extend_schema
+
+# Who queued each report job, kept as long as Celery keeps the result (one day by default)
+GUIDE_REPORT_JOB_KEY = 'advisor:guide-report:{}'
+GUIDE_REPORT_JOB_TIMEOUT = 24 * 60 * 60
 
 class AdvisorViewSet(ModelViewSet):
     queryset = Advisor.objects.all()
     serializer_class = AdvisorSerializer
     
+    # Dashboard statistics are computed together and cached; the cache is cleared by
+    # model signals (core/signals.py) whenever the underlying data changes.
+    @action(detail=False, methods=['get'], url_path='dashboard')
+    def get_dashboard(self, request):
+        return Response(get_dashboard_stats(), status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'], url_path='completed-tours-count')
     def get_completed_tours_count(self, request):
-        completed_tours_count = Tour.objects.filter(status='COMPLETED').count()
+        completed_tours_count = get_dashboard_stats()["completed_tours_count"]
         return Response({"completed_tours_count": completed_tours_count}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='tour-requests-count')
     def get_tour_requests_count(self, request):
-        tour_requests_count = TourRequest.objects.count()
+        tour_requests_count = get_dashboard_stats()["tour_requests_count"]
         return Response({"tour_requests_count": tour_requests_count}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='rejected-tours-count')
     def get_rejected_tours_count(self, request):
-        rejected_tours_count = Tour.objects.filter(status='REJECTED').count()
+        rejected_tours_count = get_dashboard_stats()["rejected_tours_count"]
         return Response({"rejected_tours_count": rejected_tours_count}, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'], url_path='total-visitors-count')
     def get_total_visitors_count(self, request):
-        total_visitors_count = Visitor.objects.count()
+        total_visitors_count = get_dashboard_stats()["total_visitors_count"]
         return Response({"total_visitors_count": total_visitors_count}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'], url_path='total-guides-count')
     def get_total_guides_count(self, request):
-        total_guides_count = Guide.objects.count()
+        total_guides_count = get_dashboard_stats()["total_guides_count"]
         return Response({"total_guides_count": total_guides_count}, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'], url_path='guides-ratings')
     def get_guides_ratings(self, request):
-        guides = Guide.objects.all()
-        guides_ratings = [{"name": guide.user.name, "rating": guide.rating} for guide in guides]
+        guides_ratings = get_dashboard_stats()["guides_ratings"]
         return Response({"guides_ratings": guides_ratings}, status=status.HTTP_200_OK)
 
+    @extend_schema(request=GuideReportInputSerializer)
     @action(detail=False, methods=['post'], url_path='send-guide-report')
     def send_guide_report(self, request):
-        email = request.data.get('email')
-        if not email:
-            return Response({"error": "Email is required."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Create an Excel workbook and sheet
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Guide Working Hours"
-        ws.append(["Guide Name", "Visitor Name", "Visitor High School", "Tour Starting", "Tour End", "Total Hour"])
-
-        one_month_ago = datetime.now() - timedelta(days=30)
-        guides = Guide.objects.all()
-
-        slot_to_hour = {
-            '09.00 AM': '9.00',
-            '11.00 AM': '11.00',
-            '13.30 PM': '13.30',
-            '16.00 PM': '16.00',
-        }
-
-        for guide in guides:
-            for tour in guide.tours.filter(date__gte=one_month_ago, status='COMPLETED'):
-                try:
-                    report = TourReport.objects.get(tour=tour, guide=guide)
-                    start_hour = slot_to_hour[tour.slot]
-                    end_hour = report.finishedAtHour + report.finishedAtMinute / 60
-                    total_hour = round(end_hour - float(start_hour), 2)
-                    ws.append([
-                        guide.user.name,
-                        tour.visitor.user.name,
-                        tour.visitor.highSchoolName,
-                        start_hour,
-                        f"{report.finishedAtHour}.{report.finishedAtMinute:02d}",
-                        total_hour
-                    ])
-                except TourReport.DoesNotExist:
-                    continue
+        """Queue the guide working-hours report; poll guide-report-status/<job_id> for progress."""
+        input_serializer = GuideReportInputSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = input_serializer.validated_data
 
-        # Save the workbook to a bytes buffer
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
+        job = send_guide_report_task.delay(data['email'], data['start_date'].isoformat(), data['end_date'].isoformat())
+        cache.set(GUIDE_REPORT_JOB_KEY.format(job.id), request.user.pk, GUIDE_REPORT_JOB_TIMEOUT)
+        return Response({"message": "Report is being generated.", "job_id": job.id}, status=status.HTTP_202_ACCEPTED)
 
-        # Send the email with the Excel attachment
-        email_message = EmailMessage(
-            subject="Guide Working Hours Report",
-            body="Please find the attached report for guide working hours.",
-            to=[email]
-        )
-        email_message.attach("guide_working_hours.xlsx", buffer.getvalue(), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        email_message.send()
+    @action(detail=False, methods=['get'], url_path='guide-report-status/(?P<job_id>[^/.]+)')
+    def get_guide_report_status(self, request, job_id=None):
+        """Progress of a report job; only the user who queued it can see it, others get 404."""
+        if cache.get(GUIDE_REPORT_JOB_KEY.format(job_id)) != request.user.pk:
+            return Response({"error": "Report job not found."}, status=status.HTTP_404_NOT_FOUND)
+        job = AsyncResult(job_id)
+        data = {"job_id": job_id, "status": job.status}
+        if job.successful():
+            data["result"] = job.result
+        elif job.failed():
+            data["error"] = str(job.result)
+        return Response(data, status=status.HTTP_200_OK)
 
-        return Response({"message": "Report sent successfully."}, status=status.HTTP_200_OK)
\ No newline at end of file
+    @extend_schema(parameters=[ExportRangeSerializer])
+    @action(detail=False, methods=['get'], url_path='guide-hours/export/(?P<file_type>csv|xlsx)')
+    def export_guide_hours(self, request, file_type=None):
+        """Download guide working hours for tours between start_date and end_date as CSV or XLSX."""
+        range_serializer = ExportRangeSerializer(data=request.query_params)
+        if not range_serializer.is_valid():
+            return Response(range_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        rows = guide_hours_rows(**range_serializer.validated_data)
+        return export_response(file_type, GUIDE_HOURS_TITLE, GUIDE_HOURS_HEADER, rows, "guide_working_hours")
@@ -4,9 +4,11 @@ from rest_framework.response import Response
 from rest_framework import status
 from core.models._Fair import Fair
 from core.serializers._fair_serializer import FairInputSerializer, FairSerializer
+from core.pagination import FairCursorPagination
 
 class FairViewSet(ModelViewSet):
     queryset = Fair.objects.all()
+    pagination_class = FairCursorPagination
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
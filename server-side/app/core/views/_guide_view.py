@@ -5,13 +5,32 @@ from core.serializers._tour_serializer import TourSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from core.pagination import GuideCursorPagination
+from core.availability import SLOT_COUNT, get_availability_matrix, invalidate_availability_matrix
 import logging
 
 logger = logging.getLogger(__name__)
 
+SLOTS_PER_DAY = 4
+
+def parse_slot_index(day, slot):
+    """Convert a (day, slot) pair to an availability index, or None if it is invalid."""
+    try:
+        day, slot = int(day), int(slot)
+    except (TypeError, ValueError):
+        return None
+    if not (0 <= day < SLOT_COUNT // SLOTS_PER_DAY and 0 <= slot < SLOTS_PER_DAY):
+        return None
+    return day * SLOTS_PER_DAY + slot
+
 class GuideViewSet(ModelViewSet):
     queryset = Guide.objects.all()
     serializer_class = GuideSerializer
+    pagination_class = GuideCursorPagination
+
+    def get_queryset(self):
+        # GuideSerializer nests the full user, including its M2M fields
+        return Guide.objects.select_related('user').prefetch_related('user__groups', 'user__user_permissions')
 
     @action(detail=True, methods=['get'])
     def tours(self, request, pk=None):
@@ -27,79 +46,103 @@ class GuideViewSet(ModelViewSet):
         available_slots = guide.availability
         return Response(available_slots)
     
-    #method to get all the guides that are available at given time and day. Those paramterers are pas
+    # Guides available at a given day and slot, or with ?slots=<i,j,...> (availability
+    # indices) at any of them; pass match=all to require every listed slot instead.
     @action(detail=False, methods=['get'])
     def available_guides(self, request, *args, **kwargs):
-        day = request.query_params.get('day')
-        slot = request.query_params.get('slot')
-        index = int(day) * 4 + int(slot)
-        guides = Guide.objects.all()
-        filtered_guides = [
-        guide for guide in guides if len(guide.availability) > index and guide.availability[index] == 1
-    ]
-        serializer = self.get_serializer(filtered_guides, many=True)
+        slots_param = request.query_params.get('slots')
+        if slots_param:
+            try:
+                indices = [int(index) for index in slots_param.split(',')]
+            except ValueError:
+                return Response({"error": "Invalid slots. Slots must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+            if not all(0 <= index < SLOT_COUNT for index in indices):
+                return Response({"error": "Invalid day or slot"}, status=status.HTTP_400_BAD_REQUEST)
+            if request.query_params.get('match', 'any') == 'all':
+                guides = self.get_queryset().available_in_all(indices)
+            else:
+                guides = self.get_queryset().available_in_any(indices)
+        else:
+            index = parse_slot_index(request.query_params.get('day'), request.query_params.get('slot'))
+            if index is None:
+                return Response({"error": "Invalid day or slot"}, status=status.HTTP_400_BAD_REQUEST)
+            guides = self.get_queryset().available_at(index)
+
+        serializer = self.get_serializer(guides, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='availability-matrix')
+    def availability_matrix(self, request):
+        """
+        Availability of every guide for all 28 slots in one cached response. Bit i of
+        masks[n] is set when guide_ids[n] is available at slot index i (day * 4 + slot).
+        """
+        return Response(get_availability_matrix(), status=status.HTTP_200_OK)
+
+    # The availability endpoints below write with a single UPDATE on the affected
+    # array elements instead of a read-modify-write of the whole row.
+    def _set_slots(self, pk, changes, message):
+        availability = Guide.objects.set_slots(pk, changes)
+        if availability is None:
+            return Response({"error": "Guide not found."}, status=status.HTTP_404_NOT_FOUND)
+        invalidate_availability_matrix()
+        return Response({"message": message, "availability": availability}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], url_path='add-availability')
     def add_availability(self, request, pk=None):
-        guide = self.get_object()
-        day = int(request.data.get('day'))
-        slot = int(request.data.get('slot'))
-        index = day * 4 + slot
-
-        if 0 <= index < 28:
-            availability = guide.availability
-            availability[index] = 1
-            guide.availability = availability
-            guide.save()
-            return Response({"message": "Availability added", "availability": guide.availability}, status=status.HTTP_200_OK)
-        else:
+        index = parse_slot_index(request.data.get('day'), request.data.get('slot'))
+        if index is None:
             return Response({"error": "Invalid day or slot"}, status=status.HTTP_400_BAD_REQUEST)
-    
+        return self._set_slots(pk, {index: 1}, "Availability added")
+
     @action(detail=True, methods=['post'], url_path='remove-availability')
     def remove_availability(self, request, pk=None):
-        guide = self.get_object()
-        day = int(request.data.get('day'))
-        slot = int(request.data.get('slot'))
-        index = day * 4 + slot
-        
-        if 0 <= index < 28:
-            availability = guide.availability
-            availability[index] = 0
-            guide.availability = availability
-            guide.save()
-            return Response({"message": "Availability removed", "availability": guide.availability}, status=status.HTTP_200_OK)
-        else:
+        index = parse_slot_index(request.data.get('day'), request.data.get('slot'))
+        if index is None:
             return Response({"error": "Invalid day or slot"}, status=status.HTTP_400_BAD_REQUEST)
-        
+        return self._set_slots(pk, {index: 0}, "Availability removed")
+
     @action(detail=True, methods=['post'], url_path='update-availability')
     def update_availability(self, request, pk=None):
-        guide = self.get_object()
-        source_day = int(request.data.get('source_day'))
-        source_slot = int(request.data.get('source_slot'))
-        target_day = int(request.data.get('target_day'))
-        target_slot = int(request.data.get('target_slot'))
-
-        source_index = source_day * 4 + source_slot
-        target_index = target_day * 4 + target_slot
-
-        if 0 <= source_index < 28 and 0 <= target_index < 28:
-            availability = guide.availability
-
-            # Remove from source
-            availability[source_index] = 0
+        source_index = parse_slot_index(request.data.get('source_day'), request.data.get('source_slot'))
+        target_index = parse_slot_index(request.data.get('target_day'), request.data.get('target_slot'))
+        if source_index is None or target_index is None:
+            return Response({"error": "Invalid source or target indices"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Add to target
-            availability[target_index] = 1
+        # Remove from source, add to target (target wins if they are the same slot)
+        changes = {source_index: 0}
+        changes[target_index] = 1
+        return self._set_slots(pk, changes, "Availability updated")
 
-            guide.availability = availability
-            guide.save()
-            return Response(
-                {"message": "Availability updated", "availability": guide.availability},
-                status=status.HTTP_200_OK,
-            )
+    @action(detail=True, methods=['post'], url_path='set-availability')
+    def set_availability(self, request, pk=None):
+        """
+        Apply up to 28 slot changes in one statement. Accepts either
+        {"changes": [{"day": d, "slot": s, "available": 0|1}, ...]} or the whole week as
+        {"availability": [28 values of 0|1]}.
+        """
+        changes = {}
+        if 'availability' in request.data:
+            availability = request.data.get('availability')
+            if not isinstance(availability, list) or len(availability) != SLOT_COUNT:
+                return Response({"error": f"availability must be a list of {SLOT_COUNT} values."}, status=status.HTTP_400_BAD_REQUEST)
+            for index, value in enumerate(availability):
+                changes[index] = value
         else:
-            return Response({"error": "Invalid source or target indices"}, status=status.HTTP_400_BAD_REQUEST)
+            items = request.data.get('changes')
+            if not isinstance(items, list) or len(items) > SLOT_COUNT:
+                return Response({"error": f"changes must be a list of at most {SLOT_COUNT} items."}, status=status.HTTP_400_BAD_REQUEST)
+            for item in items:
+                if not isinstance(item, dict):
+                    return Response({"error": "Invalid day or slot"}, status=status.HTTP_400_BAD_REQUEST)
+                index = parse_slot_index(item.get('day'), item.get('slot'))
+                if index is None:
+                    return Response({"error": "Invalid day or slot"}, status=status.HTTP_400_BAD_REQUEST)
+                changes[index] = item.get('available')
+
+        if any(value not in (0, 1) for value in changes.values()):
+            return Response({"error": "Availability values must be 0 or 1."}, status=status.HTTP_400_BAD_REQUEST)
+        return self._set_slots(pk, {index: int(value) for index, value in changes.items()}, "Availability updated")
     
     @action(detail=False, methods=['get'], url_path='guides-by-id-list')
     def get_guides_by_id_list(self, request):
@@ -4,9 +4,9 @@ from rest_framework import status as drf_status
 from rest_framework.viewsets import ModelViewSet
 from core.models._RegRequest import RegRequest
 from core.serializers._reg_request_serializer import RegRequestSerializer
-from core.models._User import User
-from django.utils.crypto import get_random_string
-from core.utils import send_email, send_rejection_email 
+from core.registration import approve_registrations, reject_registrations
+from core.serializers._bulk_serializer import BulkIdsSerializer, BulkRejectSerializer, bulk_results
+from drf_spectacular.utils import extend_schema
 
 
 class RegRequestViewSet(ModelViewSet):
@@ -19,41 +19,10 @@ class RegRequestViewSet(ModelViewSet):
             # Get the registration request
             reg_request = self.get_object()
 
-            # Debug log
-            print(f"Approving Registration Request ID: {pk}")
-
-            # Generate a random password (plain text)
-            random_password = get_random_string(length=8)
-            
-            # Create the user (plain-text password is passed here)
-            user = User.objects.create_user(
-                email=reg_request.email,
-                password=random_password,  # Pass the plain-text password
-                name=reg_request.name,
-                role="visitor",
-            )
-            print(f"User created: {user.id}, Email: {user.email}")
-
-            # Update the visitor profile created by UserManager
-            visitor = user.visitor_profile  # Access the Visitor profile linked to the user
-            visitor.type = (
-                "high-school" if reg_request.user_type == "high_school_counsellor" else "individual"
-            )
-            visitor.highSchoolName = reg_request.high_school_name
-            visitor.contactNumber = reg_request.phone_no
-            visitor.city = reg_request.city
-            visitor.save()
-            print(f"Visitor profile updated for User ID: {user.id}")
-
-            # Send the email with the plain-text password
-            send_email(
-                to_email=reg_request.email,
-                receiver=reg_request.name,
-                password=random_password,  # Send plain-text password to the user
-            )
-            
-            # Delete the registration request
-            reg_request.delete()
+            # Creates the user and profile; the password is set and emailed by a Celery task
+            error = approve_registrations([reg_request.pk])[reg_request.pk]
+            if error:
+                return Response({"error": error}, status=drf_status.HTTP_400_BAD_REQUEST)
             
             return Response({"message": "Request approved successfully."}, status=drf_status.HTTP_200_OK)
         except Exception as e:
@@ -73,19 +42,8 @@ class RegRequestViewSet(ModelViewSet):
                     status=drf_status.HTTP_400_BAD_REQUEST
                 )
 
-            # Extract user details from the registration request
-            user_email = reg_request.email
-            user_name = reg_request.name
-
-            # Send the rejection email
-            send_rejection_email(
-                to_email=user_email,
-                receiver=user_name,
-                rejection_reason=rejection_reason
-            )
-
-            # Delete the registration request
-            reg_request.delete()
+            # Deletes the request and queues the rejection email
+            reject_registrations([reg_request.pk], rejection_reason)
 
             return Response(
                 {"message": "Request rejected successfully.", "reason": rejection_reason},
@@ -95,3 +53,24 @@ class RegRequestViewSet(ModelViewSet):
             # Log and return the error
             print(f"Error during rejection: {str(e)}")
             return Response({"error": str(e)}, status=drf_status.HTTP_400_BAD_REQUEST)
+
+    @extend_schema(request=BulkIdsSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """Approve many registration requests in one transaction; returns a result per id."""
+        input_serializer = BulkIdsSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=drf_status.HTTP_400_BAD_REQUEST)
+        errors = approve_registrations(input_serializer.validated_data['ids'])
+        return Response({"results": bulk_results(errors)}, status=drf_status.HTTP_200_OK)
+
+    @extend_schema(request=BulkRejectSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-reject')
+    def bulk_reject(self, request):
+        """Reject many registration requests with one reason; returns a result per id."""
+        input_serializer = BulkRejectSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=drf_status.HTTP_400_BAD_REQUEST)
+        data = input_serializer.validated_data
+        errors = reject_registrations(data['ids'], data['reason'].strip())
+        return Response({"results": bulk_results(errors)}, status=drf_status.HTTP_200_OK)
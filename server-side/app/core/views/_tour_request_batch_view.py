@@ -5,80 +5,238 @@ from rest_framework import status
 from core.models._TourRequestBatch import TourRequestBatch
 from core.models._TourRequest import TourRequest
 from core.models._Visitor import Visitor
-from core.serializers._tour_request_batch_serializer import TourRequestBatchSerializer
+from core.serializers._tour_request_batch_serializer import (
+    TourRequestBatchSerializer, CreatedTourRequestBatchSerializer, AutoScheduleInputSerializer,
+)
 from core.serializers._tour_request_serializer import TourRequestInputSerializer  # New input serializer
 from core.serializers._tour_serializer import TourSerializer
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from core.pagination import TourRequestBatchCursorPagination
+from core.dashboard import invalidate_dashboard_stats
+from core.serializers._export_serializer import ExportRangeSerializer
+from core.reports import TOUR_REQUEST_BATCHES_HEADER, TOUR_REQUEST_BATCHES_TITLE, tour_request_batch_rows
+from core.exports import export_response
+from core.scheduling.occupancy import lock_slots, slot_occupancy
+from core.scheduling.batch_scheduling import plan_batch_schedule, apply_batch_schedule, schedule_batch_slots
+from core.serializers._bulk_serializer import (
+    BULK_MAX_IDS, BulkIdsSerializer, BulkRejectSerializer, BulkScheduleSerializer, bulk_results,
+)
+from drf_spectacular.utils import extend_schema
 
 
 class TourRequestBatchViewSet(ModelViewSet):
     """ViewSet for managing tour request batches."""
     queryset = TourRequestBatch.objects.all()
     serializer_class = TourRequestBatchSerializer
+    pagination_class = TourRequestBatchCursorPagination
+
+    def get_queryset(self):
+        # TourRequestBatchSerializer nests the requests, the visitor with its full user
+        # (including M2M fields) and the tour with its visitor and guides.
+        return TourRequestBatch.objects.select_related('visitor__user', 'tour__visitor').prefetch_related(
+            'tour_requests', 'tour__guides', 'visitor__user__groups', 'visitor__user__user_permissions',
+        )
+
+    def status_queue(self, request, batch_status):
+        """Batches in one status, newest first; cursor-paginated when the client opts in."""
+        batches = self.get_queryset().filter(status=batch_status).order_by('-timestamp', '-id')
+        page = self.paginate_queryset(batches)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        serializer = self.get_serializer(batches, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], url_path='create-with-requests')
     def create_with_requests(self, request):
-        """Create a TourRequestBatch along with associated TourRequests."""
-        input_serializer = TourRequestInputSerializer(data=request.data)
-
-        if input_serializer.is_valid():
-            data = input_serializer.validated_data
-            visitor_id = data['visitor_id']
-            dates = data['dates']
-            time_slots = data['time_slots']
-            additional_notes = data.get('additional_notes', "")
-            number_of_visitors = data['number_of_visitors']
-
-            # Get the visitor instance
-            try:
-                visitor = Visitor.objects.get(id=visitor_id)
-            except Visitor.DoesNotExist:
-                return Response({"error": "Visitor not found."}, status=status.HTTP_404_NOT_FOUND)
-
-            # Create the TourRequestBatch
-            batch = TourRequestBatch.objects.create(
-                visitor=visitor,
-                status='pending',
-                additional_notes=additional_notes,
-                number_of_visitors=number_of_visitors
+        """
+        Create a TourRequestBatch along with its TourRequests, or several batches when
+        given a list, in one transaction. Every batch is validated before anything is
+        written, and the response is built from the created objects with how booked
+        each preference already is; a list in gives a list out.
+        """
+        many = isinstance(request.data, list)
+        if many:
+            input_serializer = TourRequestInputSerializer(
+                data=request.data, many=True, allow_empty=False, max_length=BULK_MAX_IDS,
             )
+        else:
+            input_serializer = TourRequestInputSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        items = input_serializer.validated_data if many else [input_serializer.validated_data]
 
-            # Create TourRequest entries for each date and time slot
-            tour_requests = []
-            for date,time_slot in zip(dates,time_slots):
-                tour_requests.append(TourRequest(batch=batch, date=date, time_slot=time_slot))
-
-            # Bulk create tour requests
-            TourRequest.objects.bulk_create(tour_requests)
+        # Get the visitor instances, with what the response nests of their users
+        visitor_ids = {item['visitor_id'] for item in items}
+        visitors = Visitor.objects.select_related('user').prefetch_related(
+            'user__groups', 'user__user_permissions',
+        ).in_bulk(visitor_ids)
+        missing = sorted(visitor_ids - visitors.keys())
+        if missing:
+            return Response({"error": "Visitor not found.", "visitor_ids": missing}, status=status.HTTP_404_NOT_FOUND)
 
-            # Serialize and return the created batch
-            batch_serializer = self.get_serializer(batch)
-            return Response(batch_serializer.data, status=status.HTTP_201_CREATED)
+        preferences = [list(zip(item['dates'], item['time_slots'])) for item in items]
+        with transaction.atomic():
+            batches = TourRequestBatch.objects.bulk_create([
+                TourRequestBatch(
+                    visitor=visitors[item['visitor_id']],
+                    status='pending',
+                    additional_notes=item.get('additional_notes', ""),
+                    number_of_visitors=item['number_of_visitors'],
+                )
+                for item in items
+            ])
+            tour_requests = [
+                [TourRequest(batch=batch, date=date, time_slot=time_slot) for date, time_slot in batch_preferences]
+                for batch, batch_preferences in zip(batches, preferences)
+            ]
+            TourRequest.objects.bulk_create([tour_request for requests in tour_requests for tour_request in requests])
+        # bulk_create does not send post_save, so the cached request count is cleared once this commits
+        transaction.on_commit(invalidate_dashboard_stats)
 
-        return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        occupancy = slot_occupancy([preference for batch_preferences in preferences for preference in batch_preferences])
+        response_data = []
+        for batch, requests, batch_preferences in zip(batches, tour_requests, preferences):
+            batch.created_tour_requests = requests
+            data = CreatedTourRequestBatchSerializer(batch, context=self.get_serializer_context()).data
+            data['availability'] = [occupancy[preference] for preference in batch_preferences]
+            response_data.append(data)
+        return Response(response_data if many else response_data[0], status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'], url_path='schedule')
     def schedule(self, request, pk=None):
-        """Schedule a TourRequestBatch."""
+        """Schedule a TourRequestBatch, unless its (date, slot) is already full."""
         input_serializer = TourSerializer(data=request.data)
         if not input_serializer.is_valid():
             return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         batch = self.get_object()
+        slot = (input_serializer.validated_data['date'], input_serializer.validated_data['slot'])
+
+        with transaction.atomic():
+            # Other schedules into this slot wait here until this transaction ends
+            lock_slots([slot])
 
-        # Check if there is an existing scheduled tour and delete it
-        if batch.tour:
-            # Only delete the tour without affecting the TourRequestBatch
-            batch.tour.delete(keep_parents=True)
+            # Check if there is an existing scheduled tour and delete it
+            if batch.tour:
+                # Only delete the tour without affecting the TourRequestBatch
+                batch.tour.delete(keep_parents=True)
 
-        # Schedule the new tour
-        tour = input_serializer.save()
-        batch.status = 'scheduled'
-        batch.tour = tour
-        batch.save()
+            occupancy = slot_occupancy([slot])[slot]
+            if occupancy['is_full']:
+                # Keeps the previously scheduled tour
+                transaction.set_rollback(True)
+                return Response(
+                    {"error": "This time slot is fully booked.", "occupancy": occupancy},
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+            # Schedule the new tour
+            tour = input_serializer.save()
+            batch.status = 'scheduled'
+            batch.tour = tour
+            batch.save()
         
         return Response({"message": "Batch scheduled successfully."}, status=status.HTTP_200_OK)
     
+    @extend_schema(request=AutoScheduleInputSerializer)
+    @action(detail=False, methods=['post'], url_path='auto-schedule')
+    def auto_schedule(self, request):
+        """
+        Schedule all approved batches preferring dates in a range at once, giving as many
+        batches as slot capacity allows their first choice. With dry_run (the default)
+        the proposal is only returned; otherwise tours are created and linked in a single
+        transaction.
+        """
+        input_serializer = AutoScheduleInputSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = input_serializer.validated_data
+
+        tour_ids = {}
+        if data['dry_run']:
+            visitors, assignments = plan_batch_schedule(data['start_date'], data['end_date'])
+        else:
+            visitors, assignments, tour_ids = apply_batch_schedule(data['start_date'], data['end_date'])
+            # bulk_create does not send post_save, so the cached tour counts are cleared once this commits
+            transaction.on_commit(invalidate_dashboard_stats)
+
+        return Response({
+            "applied": not data['dry_run'],
+            "scheduled": [
+                {
+                    "batch_id": batch_id,
+                    "date": date,
+                    "slot": slot,
+                    "preference": rank + 1,
+                    "tour_id": tour_ids.get(batch_id),
+                }
+                for batch_id, ((date, slot), rank) in sorted(assignments.items())
+            ],
+            "first_choice_count": sum(1 for _, rank in assignments.values() if rank == 0),
+            "unscheduled_batch_ids": sorted(batch_id for batch_id in visitors if batch_id not in assignments),
+        }, status=status.HTTP_200_OK)
+
+    def bulk_status_change(self, ids, from_statuses, **changes):
+        """
+        Apply `changes` with one UPDATE to the listed batches whose status is one of
+        from_statuses, locking them first. Returns a dict mapping each id to None or an error.
+        """
+        ids = list(dict.fromkeys(ids))
+        with transaction.atomic():
+            current = dict(
+                TourRequestBatch.objects.select_for_update().filter(id__in=ids).values_list('id', 'status')
+            )
+            changed = [pk for pk in ids if current.get(pk) in from_statuses]
+            TourRequestBatch.objects.filter(id__in=changed).update(**changes)
+        return {
+            pk: None if pk in changed
+            else "Tour request batch not found." if pk not in current
+            else f"Cannot change a batch that is {current[pk]}."
+            for pk in ids
+        }
+
+    @extend_schema(request=BulkIdsSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """Approve many pending batches in one transaction; returns a result per id."""
+        input_serializer = BulkIdsSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        errors = self.bulk_status_change(input_serializer.validated_data['ids'], ['pending'], status='approved')
+        return Response({"results": bulk_results(errors)}, status=status.HTTP_200_OK)
+
+    @extend_schema(request=BulkRejectSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-reject')
+    def bulk_reject(self, request):
+        """Reject many pending or approved batches with one reason; returns a result per id."""
+        input_serializer = BulkRejectSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = input_serializer.validated_data
+        errors = self.bulk_status_change(
+            data['ids'], ['pending', 'approved'], status='rejected', rejection_reason=data['reason'].strip(),
+        )
+        return Response({"results": bulk_results(errors)}, status=status.HTTP_200_OK)
+
+    @extend_schema(request=BulkScheduleSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-schedule')
+    def bulk_schedule(self, request):
+        """
+        Schedule many batches into chosen slots in one transaction. Items are placed in
+        order; those whose slot is full when reached fail and keep their current tour.
+        """
+        input_serializer = BulkScheduleSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        errors = schedule_batch_slots([
+            (item['batch_id'], item['date'], item['slot']) for item in input_serializer.validated_data['items']
+        ])
+        if any(error is None for error in errors.values()):
+            # bulk_create does not send post_save, so the cached tour counts are cleared once this commits
+            transaction.on_commit(invalidate_dashboard_stats)
+        return Response({"results": bulk_results(errors)}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'], url_path='by-tour/(?P<tour_id>[^/.]+)')
     def get_request_batch_of_tour(self, request, tour_id=None):
         """Retrieve the TourRequestBatch associated with a specific tour_id."""
@@ -88,14 +246,20 @@ class TourRequestBatchViewSet(ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='approved')
     def get_tour_approved_request_batches(self, request):
-        """Retrieve all approved TourRequestBatch instances."""
-        approved_batches = TourRequestBatch.objects.filter(status='approved')
-        serializer = self.get_serializer(approved_batches, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        """Retrieve approved TourRequestBatch instances (?paginate=true for cursor pages)."""
+        return self.status_queue(request, 'approved')
 
     @action(detail=False, methods=['get'], url_path='pending')
     def get_tour_pending_request_batches(self, request):
-        """Retrieve all pending TourRequestBatch instances."""
-        pending_batches = TourRequestBatch.objects.filter(status='pending')
-        serializer = self.get_serializer(pending_batches, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        """Retrieve pending TourRequestBatch instances (?paginate=true for cursor pages)."""
+        return self.status_queue(request, 'pending')
+
+    @extend_schema(parameters=[ExportRangeSerializer])
+    @action(detail=False, methods=['get'], url_path='export/(?P<file_type>csv|xlsx)')
+    def export_tour_request_batches(self, request, file_type=None):
+        """Download tour request batches created between start_date and end_date as CSV or XLSX."""
+        range_serializer = ExportRangeSerializer(data=request.query_params)
+        if not range_serializer.is_valid():
+            return Response(range_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        rows = tour_request_batch_rows(**range_serializer.validated_data)
+        return export_response(file_type, TOUR_REQUEST_BATCHES_TITLE, TOUR_REQUEST_BATCHES_HEADER, rows, "tour_request_batches")
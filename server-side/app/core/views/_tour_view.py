@@ -6,16 +6,42 @@ from core.models._Tour import Tour
 from core.models._Guide import Guide
 from core.models._Visitor import Visitor
 from core.models._Advisor import Advisor
-from core.serializers._tour_serializer import TourSerializer, CompletedTourSerializer
+from core.serializers._tour_serializer import TourSerializer, CompletedTourSerializer, AutoAssignInputSerializer
 from core.serializers._review_serializer import ReviewSerializer
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from django.shortcuts import get_object_or_404
+from core.pagination import TourCursorPagination
+from core.scheduling.guide_assignment import plan_guide_assignment, apply_guide_assignment
+from core.serializers._export_serializer import ExportRangeSerializer
+from core.reports import TOURS_HEADER, TOURS_TITLE, tour_rows
+from core.exports import export_response
+
+# Map authorizedDay indices to the ISO weekday stored in Tour.weekday (1=Monday, 7=Sunday)
+ISO_WEEK_DAYS = {
+    0: 1,  # Monday
+    1: 2,  # Tuesday
+    2: 3,  # Wednesday
+    3: 4,  # Thursday
+    4: 5,  # Friday
+    5: 6,  # Saturday
+    6: 7,  # Sunday
+}
 
 class TourViewSet(ModelViewSet):
     """ViewSet for managing tours."""
     queryset = Tour.objects.all()
     serializer_class = TourSerializer
-    
+    pagination_class = TourCursorPagination
+
+    def get_queryset(self):
+        # Load the relations the tour serializers nest so every endpoint runs
+        # in a fixed number of queries regardless of how many tours it returns.
+        return Tour.objects.select_related('visitor', 'visitor__user', 'review').prefetch_related('guides')
+
+    def get_completed_queryset(self):
+        # CompletedTourSerializer nests the full visitor user, including its M2M fields.
+        return self.get_queryset().prefetch_related('visitor__user__groups', 'visitor__user__user_permissions')
+
     # Endpoint to get tours for a specific guide by guide ID
     @extend_schema(
         parameters=[
@@ -26,7 +52,7 @@ class TourViewSet(ModelViewSet):
     def get_tours_by_guide(self, request, guide_id=None):
         try:
             guide = Guide.objects.get(pk=guide_id)
-            tours = Tour.objects.filter(guides=guide)
+            tours = self.get_queryset().filter(guides=guide)
             serializer = self.get_serializer(tours, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Guide.DoesNotExist:
@@ -37,7 +63,7 @@ class TourViewSet(ModelViewSet):
     def get_tours_by_visitor(self, request, visitor_id=None):
         try:
             visitor = Visitor.objects.get(pk=visitor_id)
-            tours = Tour.objects.filter(visitor=visitor)
+            tours = self.get_queryset().filter(visitor=visitor)
             serializer = self.get_serializer(tours, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Visitor.DoesNotExist:
@@ -48,7 +74,7 @@ class TourViewSet(ModelViewSet):
     def get_tours_by_date(self, request):
         date = request.query_params.get('date')
         if date:
-            tours = Tour.objects.filter(date=date)
+            tours = self.get_queryset().filter(date=date)
             serializer = self.get_serializer(tours, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response({"error": "Date parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
@@ -82,6 +108,45 @@ class TourViewSet(ModelViewSet):
         serializer = self.get_serializer(tour)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+    @extend_schema(request=AutoAssignInputSerializer)
+    @action(detail=False, methods=['post'], url_path='auto-assign')
+    def auto_assign(self, request):
+        """
+        Assign guides to all UNASSIGNED tours in a date range in one pass, balancing
+        load across guides. With dry_run (the default) the proposal is only returned;
+        otherwise it is written in a single transaction.
+        """
+        input_serializer = AutoAssignInputSerializer(data=request.data)
+        if not input_serializer.is_valid():
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = input_serializer.validated_data
+
+        if data['dry_run']:
+            needed, assignments = plan_guide_assignment(data['start_date'], data['end_date'], data['guides_per_tour'])
+        else:
+            needed, assignments = apply_guide_assignment(data['start_date'], data['end_date'], data['guides_per_tour'])
+
+        return Response({
+            "applied": not data['dry_run'],
+            "assignments": [
+                {"tour_id": tour_id, "guide_ids": guide_ids} for tour_id, guide_ids in sorted(assignments.items())
+            ],
+            "unassigned_tour_ids": sorted(tour_id for tour_id, count in needed.items() if count and tour_id not in assignments),
+            "understaffed_tour_ids": sorted(
+                tour_id for tour_id, guide_ids in assignments.items() if len(guide_ids) < needed[tour_id]
+            ),
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(parameters=[ExportRangeSerializer])
+    @action(detail=False, methods=['get'], url_path='export/(?P<file_type>csv|xlsx)')
+    def export_tours(self, request, file_type=None):
+        """Download tours dated between start_date and end_date as CSV or XLSX."""
+        range_serializer = ExportRangeSerializer(data=request.query_params)
+        if not range_serializer.is_valid():
+            return Response(range_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        rows = tour_rows(**range_serializer.validated_data)
+        return export_response(file_type, TOURS_TITLE, TOURS_HEADER, rows, "tours")
+
     @action(detail=True, methods=['get'], url_path='completed-tours-of-advisor')
     def get_completed_tours_of_advisor(self, request, pk=None):
         """
@@ -98,19 +163,8 @@ class TourViewSet(ModelViewSet):
                 status=status.HTTP_200_OK
             )
         
-        # Map authorizedDay indices to Django's week_day (1=Sunday, 7=Saturday)
-        week_day_mapping = {
-            0: 2,  # Monday
-            1: 3,  # Tuesday
-            2: 4,  # Wednesday
-            3: 5,  # Thursday
-            4: 6,  # Friday
-            5: 7,  # Saturday
-            6: 1,  # Sunday
-        }
-
         authorized_week_days = [
-            week_day_mapping[i % 7]
+            ISO_WEEK_DAYS[i % 7]
             for i in range(len(authorized_days)) if authorized_days[i]
     ]   
 
@@ -121,9 +175,9 @@ class TourViewSet(ModelViewSet):
             )
 
         # Filter Tours based on status, advisor, and authorized days
-        tours = Tour.objects.filter(
+        tours = self.get_completed_queryset().filter(
             status='COMPLETED',
-            date__week_day__in=authorized_week_days
+            weekday__in=authorized_week_days
         )
 
         if not tours.exists():
@@ -184,7 +238,7 @@ class TourViewSet(ModelViewSet):
     def get_tours_by_visitor(self, request, visitor_id=None):
         try:
             visitor = Visitor.objects.get(pk=visitor_id)
-            tours = Tour.objects.filter(visitor=visitor)
+            tours = self.get_queryset().filter(visitor=visitor)
             serializer = self.get_serializer(tours, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Visitor.DoesNotExist:
@@ -207,19 +261,8 @@ class TourViewSet(ModelViewSet):
                     status=status.HTTP_200_OK
                 )
 
-            # Map authorizedDay indices to Django's week_day (1=Sunday, 7=Saturday)
-            week_day_mapping = {
-                0: 2,  # Monday
-                1: 3,  # Tuesday
-                2: 4,  # Wednesday
-                3: 5,  # Thursday
-                4: 6,  # Friday
-                5: 7,  # Saturday
-                6: 1,  # Sunday
-            }
-
             authorized_week_days = [
-                week_day_mapping[i]
+                ISO_WEEK_DAYS[i]
                 for i in authorized_days
             ]
 
@@ -230,8 +273,8 @@ class TourViewSet(ModelViewSet):
                 )
 
             # Filter Tours based on status, advisor, and authorized days
-            tours = Tour.objects.filter(
-                date__week_day__in=authorized_week_days
+            tours = self.get_completed_queryset().filter(
+                weekday__in=authorized_week_days
             )
 
             if not tours.exists():
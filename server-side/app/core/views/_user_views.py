@@ -11,13 +11,15 @@ from django.contrib.auth.hashers import make_password
 from django.utils.crypto import get_random_string
 from core.utils import send_email
 from decouple import config
+from core.pagination import UserCursorPagination
 import cloudinary
 
 class UserViewSet(ModelViewSet):
     """ViewSet for managing users."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    
+    pagination_class = UserCursorPagination
+
     @action(detail=False, methods=['post'], url_path='create-user') 
     def create_user(self, request):
         data = request.data